@@ -0,0 +1,94 @@
+"""
+JWT-аутентификация с кэшем проверенных токенов.
+
+Проверенный токен и загруженный по нему пользователь хранятся
+в ограниченном LRU процесса под хэшем токена. Запись действительна, пока
+не истёк срок токена и не сменилась версия пользователя `user:<id>`
+(api.cache), которую сигналы увеличивают при любом изменении или удалении
+пользователя. Версии лежат в кэше `API_VERSION_CACHE`, общем для
+процессов, поэтому смена роли или блокировка действуют и в тех
+процессах, которые уже закэшировали токен.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .cache import get_version
+
+
+def user_resource(user_id):
+    return f'user:{user_id}'
+
+
+class TokenUserCache:
+    """Потокобезопасный LRU: хэш токена -> (пользователь, версия, exp)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_users = TokenUserCache(settings.JWT_AUTH_CACHE_SIZE)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication`, который не проверяет подпись токена и не читает
+    пользователя из базы повторно, пока запись в кэше действительна.
+    Каждому запросу отдаётся копия пользователя, чтобы изменения
+    в одном запросе не попали в другие.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        key = hashlib.sha256(raw_token).hexdigest()
+        entry = token_users.get(key)
+        if entry is not None:
+            user, version, validated_token, expires_at = entry
+            if (expires_at > time.time()
+                    and version == get_version(user_resource(user.pk))):
+                return copy.copy(user), validated_token
+            token_users.discard(key)
+        validated_token = self.get_validated_token(raw_token)
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        # Версия читается до загрузки пользователя: изменение между ними
+        # сделает запись устаревшей, а не наоборот.
+        version = get_version(user_resource(user_id))
+        user = self.get_user(validated_token)
+        token_users.set(key, (user, version, validated_token,
+                              validated_token['exp']))
+        return copy.copy(user), validated_token
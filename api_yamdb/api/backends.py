@@ -0,0 +1,43 @@
+"""
+Файловый кэш для версий ресурсов API (api.cache).
+
+`FileBasedCache` увеличивает значение через get и set, и одновременные
+записи из разных процессов теряют друг друга. Здесь `incr` и `add`
+выполняются под межпроцессной блокировкой файла, а новое значение
+по-прежнему подменяет файл переименованием, поэтому читатели без
+блокировки видят либо старую, либо новую версию целиком.
+
+Версии нельзя вытеснять, поэтому кэш не ограничивает число записей и
+не перебирает каталог при каждой записи, как `FileBasedCache._cull`.
+"""
+import os
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class VersionFileCache(FileBasedCache):
+    lock_name = 'incr.lock'
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked():
+            return super().incr(key, delta, version)
+
+    def _cull(self):
+        pass
@@ -0,0 +1,145 @@
+"""
+Версии ресурсов API и кэш ответов, который инвалидируется их сменой.
+
+Версия каждого ресурса хранится в кэше `API_VERSION_CACHE`, общем для
+всех процессов, и увеличивается при любом изменении данных, от которых
+он зависит; вместе с ней запоминается время изменения. Ключи ответов
+и ETag включают версию, поэтому после записи старые ответы просто
+перестают находиться, в каком бы процессе они ни были закэшированы.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+VERSION_KEY = 'api:version:{}'
+MODIFIED_KEY = 'api:modified:{}'
+RESPONSE_KEY = 'api:response:{}:{}:{}'
+STATS_KEY = 'api:cache-stats:{}'
+
+
+def _initial_version():
+    # Если ключ версии вытеснен из кэша, новая версия не должна совпасть
+    # ни с одной из выданных ранее, поэтому отсчёт начинается от времени.
+    return time.time_ns() // 1000
+
+
+def _versions():
+    return caches[settings.API_VERSION_CACHE]
+
+
+def get_version(resource):
+    versions = _versions()
+    key = VERSION_KEY.format(resource)
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, _initial_version(), timeout=None)
+        version = versions.get(key)
+    return version
+
+
+def bump_version(*resources):
+    """
+    Увеличивает версии ресурсов и возвращает новые значения.
+    """
+    store = _versions()
+    versions = {}
+    for resource in resources:
+        key = VERSION_KEY.format(resource)
+        try:
+            versions[resource] = store.incr(key)
+        except ValueError:
+            versions[resource] = _initial_version()
+            store.add(key, versions[resource], timeout=None)
+    now = time.time()
+    store.set_many(
+        {MODIFIED_KEY.format(resource): now for resource in resources},
+        timeout=None
+    )
+    return versions
+
+
+def get_last_modified(*resources):
+    """
+    Время последнего изменения ресурсов. Если оно неизвестно (например,
+    ключ вытеснен), считается, что ресурс изменился только что.
+    """
+    store = _versions()
+    keys = [MODIFIED_KEY.format(resource) for resource in resources]
+    found = store.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            store.add(key, now, timeout=None)
+            found[key] = store.get(key, now)
+    return max(found.values())
+
+
+def etag(resources, request):
+    """
+    Сильный ETag ответа: версии ресурсов, URL запроса и тип содержимого.
+    """
+    url = '{}?{}'.format(
+        request.build_absolute_uri(request.path),
+        normalize_query(request.query_params)
+    )
+    versions = ','.join(
+        f'{resource}={get_version(resource)}' for resource in resources
+    )
+    digest = hashlib.md5(
+        f'{versions}|{url}|{request.accepted_media_type}'.encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def normalize_query(query_params):
+    """
+    Приводит параметры запроса к каноническому виду, сортируя ключи.
+    Пустые значения сохраняются: например, `?cursor=` меняет пагинацию.
+    """
+    items = [
+        (key, value)
+        for key in sorted(query_params)
+        for value in query_params.getlist(key)
+    ]
+    return urlencode(items)
+
+
+def response_key(resource, request):
+    url = '{}?{}'.format(
+        request.build_absolute_uri(request.path),
+        normalize_query(request.query_params)
+    )
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return RESPONSE_KEY.format(resource, get_version(resource), digest)
+
+
+def get_response_data(key):
+    data = cache.get(key)
+    _count('hits' if data is not None else 'misses')
+    return data
+
+
+def set_response_data(key, data):
+    cache.set(key, data, timeout=settings.API_RESPONSE_CACHE_TIMEOUT)
+
+
+def _count(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats():
+    hits = cache.get(STATS_KEY.format('hits'), 0)
+    misses = cache.get(STATS_KEY.format('misses'), 0)
+    return {'hits': hits, 'misses': misses}
+
+
+def reset_stats():
+    cache.delete_many([STATS_KEY.format('hits'), STATS_KEY.format('misses')])
@@ -0,0 +1,84 @@
+"""
+Справочники категорий и жанров в памяти процесса.
+
+Таблицы маленькие и меняются редко, поэтому каждая целиком держится
+в памяти как неизменяемый снимок: объекты в порядке модели и словари по
+slug и id. Снимок привязан к версии ресурса (`categories` или `genres`)
+из общего кэша, которую сигналы увеличивают при любом изменении
+справочника; если версия сдвинулась, в том числе в другом процессе,
+справочник перечитывается одним запросом.
+
+Запись произведения проверяет slug по снимку, только пока он моложе
+`CATALOG_MAX_AGE` секунд. Более старый снимок мог пропустить изменение
+(например, если версия не увеличилась из-за сбоя процесса после
+фиксации), поэтому перед проверкой он перечитывается: удалённая в другом
+процессе категория не дойдёт до INSERT и ошибки целостности.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from reviews.models import Category, Genre
+from .cache import get_version
+
+
+class CatalogSnapshot:
+    __slots__ = ('version', 'objects', 'by_slug', 'by_pk', 'loaded_at')
+
+    def __init__(self, version, objects):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.objects = tuple(objects)
+        self.by_slug = {obj.slug: obj for obj in self.objects}
+        self.by_pk = {obj.pk: obj for obj in self.objects}
+
+
+class Catalog:
+    def __init__(self, model, resource):
+        self.model = model
+        self.resource = resource
+        self.lock = threading.Lock()
+        self.current = None
+
+    def __deepcopy__(self, memo):
+        # Поля DRF копируют аргументы вместе с сериализатором, а справочник
+        # один на процесс.
+        return self
+
+    def snapshot(self, max_age=None):
+        """
+        Актуальный снимок справочника; с `max_age` снимок старше стольких
+        секунд перечитывается, даже если версия не менялась. Версия
+        читается до загрузки: изменение во время загрузки сделает снимок
+        устаревшим, а не наоборот. Объекты снимка общие для всех потоков,
+        их нельзя менять.
+        """
+        def is_fresh(snapshot):
+            return snapshot is not None and snapshot.version == version and (
+                max_age is None
+                or time.monotonic() - snapshot.loaded_at <= max_age
+            )
+
+        version = get_version(self.resource)
+        snapshot = self.current
+        if is_fresh(snapshot):
+            return snapshot
+        with self.lock:
+            snapshot = self.current
+            if not is_fresh(snapshot):
+                snapshot = CatalogSnapshot(version, self.model.objects.all())
+                self.current = snapshot
+        return snapshot
+
+    def by_slug(self, slugs):
+        """
+        Объекты справочника с данными slug для записи. Снимок старше
+        `CATALOG_MAX_AGE` сначала перечитывается из базы.
+        """
+        by_slug = self.snapshot(settings.CATALOG_MAX_AGE).by_slug
+        return {slug: by_slug[slug] for slug in slugs if slug in by_slug}
+
+
+categories = Catalog(Category, 'categories')
+genres = Catalog(Genre, 'genres')
@@ -0,0 +1,150 @@
+"""
+Потоковая выгрузка отзывов произведения в NDJSON и CSV.
+
+Строки читаются из базы через `iterator(chunk_size=...)` кортежами
+`values_list` и сериализуются без `ReviewSerializer`, поэтому память не
+зависит от числа отзывов. Комментарии читаются вторым курсором в порядке
+отзывов и сливаются с ними, так что в памяти одновременно находятся
+комментарии только одного отзыва.
+"""
+import csv
+import io
+import itertools
+import json
+
+from rest_framework.fields import DateTimeField
+
+from reviews.models import Comment, Review
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+REVIEW_COLUMNS = ('id', 'author__username', 'text', 'score', 'pub_date',
+                  'comments_count', 'last_comment_at')
+COMMENT_COLUMNS = ('review_id', 'id', 'author__username', 'text',
+                   'pub_date')
+CSV_HEADER = ('review_id', 'comment_id', 'author', 'text', 'score',
+              'pub_date', 'comments_count', 'last_comment_at')
+
+datetime_field = DateTimeField()
+
+
+def format_datetime(value):
+    """Дата в том же формате, что и в ответах API."""
+    return None if value is None else datetime_field.to_representation(value)
+
+
+def iter_reviews(title_id, chunk_size):
+    # Отзывы и комментарии удалённых пользователей скрыты до очистки.
+    return Review.objects.filter(
+        title_id=title_id, author__deleted_at__isnull=True
+    ).order_by('id').values_list(*REVIEW_COLUMNS).iterator(
+        chunk_size=chunk_size
+    )
+
+
+def iter_comment_groups(title_id, chunk_size):
+    """Комментарии произведения, сгруппированные по отзывам."""
+    comments = Comment.objects.filter(
+        review__title_id=title_id, author__deleted_at__isnull=True,
+        review__author__deleted_at__isnull=True
+    ).order_by('review_id', 'pub_date', 'id').values_list(
+        *COMMENT_COLUMNS
+    ).iterator(chunk_size=chunk_size)
+    return itertools.groupby(comments, key=lambda row: row[0])
+
+
+def iter_reviews_with_comments(title_id, chunk_size, with_comments):
+    """
+    Пары (отзыв, комментарии отзыва). Без `with_comments` комментарии
+    не запрашиваются и список пуст.
+    """
+    reviews = iter_reviews(title_id, chunk_size)
+    if not with_comments:
+        for review in reviews:
+            yield review, []
+        return
+    groups = iter_comment_groups(title_id, chunk_size)
+    group_id, group = next(groups, (None, ()))
+    for review in reviews:
+        comments = []
+        # Комментарии могут ссылаться на отзыв, созданный после открытия
+        # курсора отзывов: такие группы пропускаются.
+        while group_id is not None and group_id < review[0]:
+            group_id, group = next(groups, (None, ()))
+        if group_id == review[0]:
+            comments = list(group)
+            group_id, group = next(groups, (None, ()))
+        yield review, comments
+
+
+def ndjson_lines(pairs, with_comments):
+    for (pk, author, text, score, pub_date, comments_count,
+            last_comment_at), comments in pairs:
+        record = {
+            'id': pk,
+            'author': author,
+            'text': text,
+            'score': score,
+            'pub_date': format_datetime(pub_date),
+            'comments_count': comments_count,
+            'last_comment_at': format_datetime(last_comment_at),
+        }
+        if with_comments:
+            record['comments'] = [
+                {
+                    'id': comment_id,
+                    'author': comment_author,
+                    'text': comment_text,
+                    'pub_date': format_datetime(comment_date),
+                }
+                for _, comment_id, comment_author, comment_text, comment_date
+                in comments
+            ]
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def csv_lines(pairs, with_comments):
+    """
+    Строка отзыва, за которой идут строки его комментариев с заполненным
+    `comment_id` и пустыми полями отзыва.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(row):
+        writer.writerow(row)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(CSV_HEADER)
+    for (pk, author, text, score, pub_date, comments_count,
+            last_comment_at), comments in pairs:
+        yield line((
+            pk, '', author, text, score, format_datetime(pub_date),
+            comments_count, format_datetime(last_comment_at) or ''
+        ))
+        for review_id, comment_id, *comment, comment_date in comments:
+            yield line((
+                review_id, comment_id, *comment, '',
+                format_datetime(comment_date), '', ''
+            ))
+
+
+def export_reviews(title_id, output, with_comments, chunk_size):
+    """
+    Генератор фрагментов выгрузки: строки собираются по `chunk_size`
+    и отдаются одним куском, чтобы не писать в сокет по строке.
+    """
+    lines = {'ndjson': ndjson_lines, 'csv': csv_lines}[output](
+        iter_reviews_with_comments(title_id, chunk_size, with_comments),
+        with_comments
+    )
+    while True:
+        chunk = ''.join(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,337 @@
+"""
+Битовый индекс произведений по жанрам, категориям и годам.
+
+Для каждого значения фасета хранится битсет id произведений. Фильтр
+`/titles/?genre=a,b&category=c&year=1994` сводится к объединению и
+пересечению битсетов и одному запросу по первичному ключу. Большой
+результат не передаётся в базу целиком: индекс хранит id произведений
+в порядке названий и отдаёт id только запрошенной страницы.
+
+Индекс строится при запуске процесса (`warm_up` из wsgi/asgi) или при
+первом обращении и дальше обновляется сигналами. Он привязан к своей
+версии `facets` из общего кэша, которую увеличивают только изменения
+произведений, их жанров, категорий и жанров: каждый патч переводит
+индекс на следующую версию, а если версия сдвинулась в другом процессе,
+индекс перестраивается. Отзывы и пересчёт рейтингов индекс не трогают.
+"""
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from reviews.models import Category, Genre, GenreTitle, Title
+from .cache import get_version
+
+FACETS_RESOURCE = 'facets'
+
+
+class Bitset:
+    """
+    Изменяемый битсет на bytearray: установка и сброс бита за O(1).
+    """
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, number):
+        byte = number >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1))
+        self.bits[byte] |= 1 << (number & 7)
+
+    def discard(self, number):
+        byte = number >> 3
+        if byte < len(self.bits):
+            self.bits[byte] &= ~(1 << (number & 7)) & 0xFF
+
+    def to_int(self):
+        return int.from_bytes(self.bits, 'little')
+
+
+def int_to_ids(value):
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+    for match in re.finditer(rb'[^\x00]', data):
+        byte = match.start()
+        for bit in range(8):
+            if data[byte] >> bit & 1:
+                yield byte * 8 + bit
+
+
+def parse_facet(value):
+    """
+    Разбирает значение фасета `a,b,!c` на включаемые и исключаемые.
+    """
+    include, exclude = [], []
+    for item in value.split(','):
+        item = item.strip()
+        if item.startswith('!'):
+            exclude.append(item[1:])
+        elif item:
+            include.append(item)
+    return include, exclude
+
+
+class FacetMatch:
+    """Результат фильтра по фасетам: битовая маска id произведений."""
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = mask
+        self.count = bin(mask).count('1')
+
+    def ids(self):
+        return list(int_to_ids(self.mask))
+
+    def ordered_ids(self, start, stop):
+        return self.index.ordered_ids(self.mask, self.count, start, stop)
+
+
+class FacetPage:
+    """
+    Последовательность для Paginator: длина берётся из маски, а срез
+    выбирает id страницы из индекса и загружает их из `queryset` одним
+    запросом по первичному ключу. Порядок — по названию, как в списке
+    произведений.
+    """
+
+    def __init__(self, match, queryset):
+        self.match = match
+        self.queryset = queryset
+
+    def __len__(self):
+        return self.match.count
+
+    def __getitem__(self, key):
+        ids = self.match.ordered_ids(key.start or 0, key.stop)
+        titles = self.queryset.order_by().in_bulk(ids)
+        return [titles[pk] for pk in ids if pk in titles]
+
+
+class TitleFacetIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+
+    def rebuild(self):
+        version = get_version(FACETS_RESOURCE)
+        all_titles = Bitset()
+        categories = defaultdict(Bitset)
+        years = defaultdict(Bitset)
+        genres = defaultdict(Bitset)
+        rows = {}
+        titles = Title.objects.order_by().values_list(
+            'pk', 'name', 'category_id', 'year'
+        )
+        for pk, name, category_id, year in titles.iterator():
+            all_titles.add(pk)
+            if category_id is not None:
+                categories[category_id].add(pk)
+            years[year].add(pk)
+            rows[pk] = (name, category_id, year)
+        links = GenreTitle.objects.order_by().values_list(
+            'title_id', 'genre_id'
+        )
+        for title_id, genre_id in links.iterator():
+            genres[genre_id].add(title_id)
+        self.all_titles = all_titles
+        self.categories = categories
+        self.years = years
+        self.genres = genres
+        # Название, категория и год каждого произведения: патч снимает
+        # его только с прежних битсетов и позиции в порядке названий.
+        self.rows = rows
+        # Кортеж заменяется целиком при каждом патче: читатель берёт
+        # ссылку под блокировкой и обходит её уже без блокировки.
+        self.by_name = tuple(sorted(
+            (name, pk) for pk, (name, _, _) in rows.items()
+        ))
+        self.category_slugs = dict(
+            Category.objects.values_list('slug', 'pk')
+        )
+        self.genre_slugs = dict(Genre.objects.values_list('slug', 'pk'))
+        self.version = version
+
+    def advance(self, version, patch=None):
+        """
+        Применяет патч, если индекс находится ровно на предыдущей версии,
+        иначе помечает индекс устаревшим.
+        """
+        with self.lock:
+            if self.version is None or self.version != version - 1:
+                self.version = None
+                return
+            if patch is not None:
+                patch(self)
+            self.version = version
+
+    def match(self, genre=((), ()), category=((), ()), year=((), ())):
+        """Маска произведений, подходящих под фасеты."""
+        with self.lock:
+            if self.version != get_version(FACETS_RESOURCE):
+                self.rebuild()
+            result = self.all_titles.to_int()
+            for (include, exclude), bitsets, resolve in (
+                (genre, self.genres, self.genre_slugs.get),
+                (category, self.categories, self.category_slugs.get),
+                (year, self.years, int),
+            ):
+                if include:
+                    selected = 0
+                    for value in include:
+                        key = resolve(value)
+                        if key in bitsets:
+                            selected |= bitsets[key].to_int()
+                    result &= selected
+                for value in exclude:
+                    key = resolve(value)
+                    if key in bitsets:
+                        result &= ~bitsets[key].to_int()
+        return FacetMatch(self, result)
+
+    def ordered_ids(self, mask, count, start, stop):
+        """
+        Id из маски (`count` установленных битов) с позициями
+        [start, stop) в порядке (название, id). Если совпадений мало
+        относительно глубины страницы, их ключи сортировки собираются
+        под блокировкой и из них выбираются первые `stop`: O(count).
+        Иначе без блокировки обходится снимок порядка названий до конца
+        страницы: примерно stop * всего / count строк.
+        """
+        with self.lock:
+            by_name = self.by_name
+            total = len(by_name)
+            if stop is None or count * count <= stop * total:
+                keys = [
+                    (self.rows[pk][0], pk) for pk in int_to_ids(mask)
+                    if pk in self.rows
+                ]
+                by_name = None
+        if by_name is None:
+            if stop is None:
+                keys.sort()
+            else:
+                keys = heapq.nsmallest(stop, keys)
+            return [pk for _, pk in keys[start:stop]]
+        bits = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        size = len(bits)
+        ids = []
+        position = 0
+        for _, pk in by_name:
+            byte = pk >> 3
+            if byte >= size or not bits[byte] >> (pk & 7) & 1:
+                continue
+            if position >= start:
+                ids.append(pk)
+            position += 1
+            if position >= stop:
+                break
+        return ids
+
+    # Патчи вызываются под блокировкой из advance().
+
+    def forget_title(self, pk):
+        """Снимает произведение с битсетов его прежних категории и года."""
+        row = self.rows.pop(pk, None)
+        if row is None:
+            return
+        name, category_id, year = row
+        if category_id in self.categories:
+            self.categories[category_id].discard(pk)
+        if year in self.years:
+            self.years[year].discard(pk)
+        position = bisect.bisect_left(self.by_name, (name, pk))
+        if self.by_name[position:position + 1] == ((name, pk),):
+            self.by_name = (
+                self.by_name[:position] + self.by_name[position + 1:]
+            )
+
+    def title_saved(self, pk, name, category_id, year):
+        self.forget_title(pk)
+        self.all_titles.add(pk)
+        if category_id is not None:
+            self.categories[category_id].add(pk)
+        self.years[year].add(pk)
+        self.rows[pk] = (name, category_id, year)
+        position = bisect.bisect_left(self.by_name, (name, pk))
+        self.by_name = (
+            self.by_name[:position] + ((name, pk),)
+            + self.by_name[position:]
+        )
+
+    def title_deleted(self, pk):
+        self.forget_title(pk)
+        self.all_titles.discard(pk)
+        for bitset in self.genres.values():
+            bitset.discard(pk)
+
+    def genres_added(self, title_ids, genre_ids):
+        for genre_id in genre_ids:
+            for title_id in title_ids:
+                self.genres[genre_id].add(title_id)
+
+    def genres_removed(self, title_ids, genre_ids=None):
+        if genre_ids is None:
+            genre_ids = list(self.genres)
+        for genre_id in genre_ids:
+            if genre_id in self.genres:
+                for title_id in title_ids:
+                    self.genres[genre_id].discard(title_id)
+
+    def genre_cleared(self, pk):
+        self.genres.pop(pk, None)
+
+    def category_saved(self, pk, slug):
+        self.category_slugs = {
+            key: value for key, value in self.category_slugs.items()
+            if value != pk
+        }
+        self.category_slugs[slug] = pk
+
+    def category_deleted(self, pk):
+        self.category_slugs = {
+            key: value for key, value in self.category_slugs.items()
+            if value != pk
+        }
+        # Произведения остаются без категории (SET_NULL).
+        bitset = self.categories.pop(pk, None)
+        if bitset is not None:
+            for title_id in int_to_ids(bitset.to_int()):
+                name, _, year = self.rows[title_id]
+                self.rows[title_id] = (name, None, year)
+
+    def genre_saved(self, pk, slug):
+        self.genre_slugs = {
+            key: value for key, value in self.genre_slugs.items()
+            if value != pk
+        }
+        self.genre_slugs[slug] = pk
+
+    def genre_deleted(self, pk):
+        self.genres.pop(pk, None)
+        self.genre_slugs = {
+            key: value for key, value in self.genre_slugs.items()
+            if value != pk
+        }
+
+
+title_facets = TitleFacetIndex()
+
+
+def warm_up():
+    """
+    Строит индекс при запуске процесса, чтобы его не строил первый запрос.
+    """
+    if not settings.TITLE_FACET_INDEX:
+        return
+    try:
+        with title_facets.lock:
+            title_facets.rebuild()
+    except DatabaseError:
+        # База ещё не готова (например, до migrate): индекс построится
+        # при первом запросе с фасетами.
+        pass
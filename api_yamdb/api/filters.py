@@ -1,13 +1,143 @@
+from django.conf import settings
+from django.core.validators import RegexValidator
 from django_filters import CharFilter
 from django_filters.rest_framework import FilterSet
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
 from reviews.models import Title
+from reviews.search import search_titles
+
+from .facets import parse_facet, title_facets
+
+FACETS = {
+    'genre': 'genre__slug',
+    'category': 'category__slug',
+    'year': 'year',
+}
 
 
 class TitleFilter(FilterSet):
-    category = CharFilter(field_name='category__slug',)
-    genre = CharFilter(field_name='genre__slug',)
+    """
+    Фасеты `genre`, `category` и `year` принимают несколько значений
+    через запятую, значения с `!` исключаются. Комбинация фасетов
+    вычисляется по битовому индексу, а если он выключен, через
+    соединения в базе.
+
+    Результат до `TITLE_FACET_INDEX_MAX_IDS` произведений фильтруется
+    по списку id. Больший результат без других фильтров в списке
+    с номерами страниц сохраняется в `request.title_facet_match`:
+    страницу по нему выбирает индекс (`TitleViewSet.paginate_queryset`)
+    одним запросом по первичному ключу. Соединения остаются только для
+    курсорной пагинации и карточки произведения.
+    """
+    category = CharFilter(method='filter_facet')
+    genre = CharFilter(method='filter_facet')
+    year = CharFilter(
+        method='filter_facet',
+        validators=[RegexValidator(r'^!?\d+(,!?\d+)*$')]
+    )
     name = CharFilter(field_name='name',)
+    q = CharFilter(method='search')
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year')
+        fields = ('name', 'category', 'genre', 'year', 'q')
+
+    def filter_queryset(self, queryset):
+        facets = {
+            name: parse_facet(self.form.cleaned_data[name])
+            for name in FACETS if self.form.cleaned_data.get(name)
+        }
+        if facets and settings.TITLE_FACET_INDEX:
+            match = title_facets.match(**facets)
+            if match.count <= settings.TITLE_FACET_INDEX_MAX_IDS:
+                queryset = queryset.filter(pk__in=match.ids())
+                facets_applied = True
+            else:
+                facets_applied = self.index_pages(match)
+            if facets_applied:
+                for name in facets:
+                    self.form.cleaned_data[name] = None
+        return super().filter_queryset(queryset)
+
+    def index_pages(self, match):
+        """
+        Отдаёт страницы большого результата индексу, если это список
+        с номерами страниц без других фильтров.
+        """
+        view = getattr(self.request, 'parser_context', {}).get('view')
+        if (getattr(view, 'action', None) != 'list'
+                or view.paginator.cursor_query_param
+                in self.request.query_params
+                or any(self.form.cleaned_data.get(name)
+                       for name in ('name', 'q'))):
+            return False
+        self.request.title_facet_match = match
+        return True
+
+    def filter_facet(self, queryset, name, value):
+        include, exclude = parse_facet(value)
+        lookup = FACETS[name]
+        if include:
+            queryset = queryset.filter(**{f'{lookup}__in': include})
+        if exclude:
+            queryset = queryset.exclude(**{f'{lookup}__in': exclude})
+        if name == 'genre' and include:
+            # Несколько жанров произведения дают дубли строк соединения.
+            queryset = queryset.distinct()
+        return queryset
+
+    def search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка `?ordering=`, дополненная первичным ключом в том же
+    направлении, что и последнее поле: порядок страниц однозначен,
+    а составной индекс (родитель, поле, id) читается одним проходом.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering == self.get_default_ordering(view):
+            return ordering
+        last = ordering[-1]
+        if last.lstrip('-') in ('id', 'pk'):
+            return ordering
+        return (*ordering, '-id' if last.startswith('-') else 'id')
+
+
+def prefix_condition(fields, prefix):
+    """
+    Условие «одно из полей начинается с `prefix`» по значениям,
+    приведённым `casefold()`.
+    """
+    prefix = prefix.casefold()
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{
+            f'{field}__gte': prefix,
+            f'{field}__lt': prefix + '\U0010ffff',
+        })
+    return condition
+
+
+class PrefixSearchFilter(BaseFilterBackend):
+    """
+    Поиск `?search=` по префиксу без учёта регистра. Поля
+    `prefix_search_fields` должны хранить значения, приведённые
+    `casefold()`, и иметь индекс: префикс ищется диапазоном
+    [prefix, prefix + U+10FFFF), который читается из индекса, в отличие
+    от `icontains`.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        prefix = request.query_params.get(self.search_param, '').strip()
+        if not prefix:
+            return queryset
+        return queryset.filter(
+            prefix_condition(view.prefix_search_fields, prefix)
+        )
@@ -0,0 +1,87 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from users.models import OutgoingEmail, User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark /auth/signup/ throughput under concurrent requests. '
+        'Benchmark users and their emails are deleted afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--repeat', action='store_true',
+            help='Also benchmark repeated signups of existing users'
+        )
+
+    def signup(self, data):
+        client = Client()
+        started = time.perf_counter()
+        try:
+            response = client.post(SIGNUP_URL, data=data)
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        finally:
+            connection.close()
+        return ok, time.perf_counter() - started
+
+    def run(self, label, payloads, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self.signup, payloads))
+        elapsed = time.perf_counter() - started
+        latencies = [latency for _, latency in results]
+        errors = sum(not ok for ok, _ in results)
+        self.stdout.write(
+            f'{label}: {len(results)} requests, {concurrency} concurrent, '
+            f'{len(results) / elapsed:.0f} signups/s, '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+            f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms, '
+            f'{errors} errors'
+        )
+
+    def handle(self, *args, **options):
+        prefix = f'bench{uuid.uuid4().hex[:8]}'
+        payloads = [
+            {'username': f'{prefix}_{idx}',
+             'email': f'{prefix}_{idx}@bench.fake'}
+            for idx in range(options['requests'])
+        ]
+        # Письма не отправляются, а ограничение частоты отключено:
+        # измеряется только путь регистрации.
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {},
+        }
+        with override_settings(OUTBOX_SEND_ON_COMMIT=False,
+                               REST_FRAMEWORK=rest_framework):
+            try:
+                self.run('new users', payloads, options['concurrency'])
+                if options['repeat']:
+                    self.run(
+                        'repeated signups', payloads, options['concurrency']
+                    )
+            finally:
+                OutgoingEmail.objects.filter(
+                    recipient__startswith=prefix
+                ).delete()
+                User.objects.filter(username__startswith=prefix).delete()
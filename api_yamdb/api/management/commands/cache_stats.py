@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api import cache
+
+
+class Command(BaseCommand):
+    help = 'Show API response cache hit/miss counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reset the counters after printing them'
+        )
+
+    def handle(self, *args, **options):
+        stats = cache.get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'hits: {stats["hits"]}, misses: {stats["misses"]}, '
+            f'hit ratio: {ratio:.2%}'
+        )
+        if options['reset']:
+            cache.reset_stats()
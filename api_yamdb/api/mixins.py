@@ -1,4 +1,16 @@
-from rest_framework import mixins, viewsets
+import math
+import time
+
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from reviews.models import Review, Title
+from . import cache
 
 
 class ListCreateDestroyViewSet(mixins.CreateModelMixin,
@@ -9,3 +21,240 @@ class ListCreateDestroyViewSet(mixins.CreateModelMixin,
     A viewset that provides default `create()`, `destroy()`, `list()` actions.
     """
     pass
+
+
+class CatalogListMixin:
+    """
+    Список без поиска отдаётся из справочника в памяти `catalog`
+    (api.catalog) без запросов к базе.
+    """
+    catalog = None
+
+    def filter_queryset(self, queryset):
+        if (self.action == 'list' and not self.request.query_params.get(
+                api_settings.SEARCH_PARAM)):
+            return self.catalog.snapshot().objects
+        return super().filter_queryset(queryset)
+
+
+class CachedResponseMixin:
+    """
+    Кэширует ответы на анонимные GET-запросы под текущей версией ресурса
+    `cache_resource`. Версия увеличивается сигналами при изменении данных.
+    """
+    cache_resource = None
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = cache.response_key(self.cache_resource, request)
+        data = cache.get_response_data(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set_response_data(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalResponseMixin:
+    """
+    Отдаёт ETag и Last-Modified, вычисленные по версиям ресурсов
+    `etag_resources`, и отвечает 304 Not Modified без сериализации.
+    Имена ресурсов могут ссылаться на параметры URL, например
+    `'reviews:{title_id}'`; родители вложенного маршрута проверяются
+    до ответа 304, чтобы несуществующий родитель давал 404.
+    """
+    etag_resources = ()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if 'title_id' in self.kwargs:
+            self.get_title()
+        resources = [
+            resource.format(**self.kwargs) for resource in self.etag_resources
+        ]
+        etag = cache.etag(resources, request)
+        modified = cache.get_last_modified(*resources)
+        # Last-Modified точен до секунды. Пока секунда изменения не
+        # прошла, метка округляется вниз и по If-Modified-Since не даёт
+        # 304: иначе запись в ту же секунду осталась бы незамеченной.
+        last_modified = math.ceil(modified)
+        if last_modified > time.time():
+            last_modified = int(modified)
+        if_none_match = request.headers.get('If-None-Match')
+        any_match = False
+        if if_none_match is not None:
+            any_match = if_none_match.strip() == '*'
+            not_modified = etag in (
+                tag.strip() for tag in if_none_match.split(',')
+            )
+        else:
+            since = parse_http_date_safe(
+                request.headers.get('If-Modified-Since', '')
+            )
+            not_modified = since is not None and modified < since
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            # `*` совпадает с любым существующим представлением.
+            if any_match and response.status_code == 200:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=0, must_revalidate=True
+                )
+            patch_vary_headers(response, ('Authorization', 'Accept'))
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class NestedResourceMixin:
+    """
+    Разрешает родителей вложенных маршрутов `titles/{title_id}/reviews/
+    {review_id}/` один раз за запрос: отзыв загружается вместе
+    с произведением одним запросом с соединением и проверкой, что он
+    принадлежит `title_id`. Результат, в том числе 404, запоминается
+    на объекте запроса.
+    """
+    def resolve_parent(self, name, loader):
+        resolved = getattr(self.request, '_nested_resources', None)
+        if resolved is None:
+            resolved = self.request._nested_resources = {}
+        if name not in resolved:
+            try:
+                resolved[name] = loader()
+            except (Title.DoesNotExist, Review.DoesNotExist):
+                resolved[name] = Http404
+        if resolved[name] is Http404:
+            raise Http404
+        return resolved[name]
+
+    def get_review(self):
+        return self.resolve_parent(
+            'review',
+            lambda: Review.objects.select_related('title').get(
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+                title__deleted_at__isnull=True,
+                author__deleted_at__isnull=True
+            )
+        )
+
+    def get_title(self):
+        if 'review_id' in self.kwargs:
+            return self.get_review().title
+        return self.resolve_parent(
+            'title',
+            lambda: Title.objects.get(pk=self.kwargs.get('title_id'))
+        )
+
+
+def requested_fields(request, available):
+    """
+    Имена полей из `available`, которые нужно отдать согласно параметрам
+    `?fields=` и `?omit=`, или `None`, если набор полей не сужен.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if not fields and not omit:
+        return None
+    keep = list(available)
+    if fields:
+        fields = set(fields.split(','))
+        keep = [name for name in keep if name in fields]
+    if omit:
+        omit = set(omit.split(','))
+        keep = [name for name in keep if name not in omit]
+    return keep
+
+
+class SparseFieldsetMixin:
+    """
+    Убирает из сериализатора поля, не запрошенные через `?fields=`
+    или исключённые через `?omit=`.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = requested_fields(self.context.get('request'), self.fields)
+        if keep is not None:
+            for name in set(self.fields) - set(keep):
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """
+    Сужает queryset под поля из `?fields=`/`?omit=`: загружаются только
+    нужные столбцы, а ненужные select_related и prefetch_related
+    пропускаются.
+
+    `sparse_columns` сопоставляет полю сериализатора столбцы модели,
+    `sparse_select_related` и `sparse_prefetch_related` — связи, которые
+    нужны полю.
+    """
+    sparse_columns = {}
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        keep = requested_fields(self.request, self.sparse_columns)
+        if keep is None:
+            keep = list(self.sparse_columns)
+        else:
+            columns = {'pk'}
+            for name in keep:
+                columns.update(self.sparse_columns[name])
+            ordering = (
+                queryset.query.order_by or queryset.model._meta.ordering
+            )
+            columns.update(field.lstrip('-') for field in ordering)
+            queryset = queryset.only(*columns)
+        select = [
+            self.sparse_select_related[name] for name in keep
+            if name in self.sparse_select_related
+        ]
+        prefetch = [
+            self.sparse_prefetch_related[name] for name in keep
+            if name in self.sparse_prefetch_related
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
@@ -0,0 +1,177 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as Base64Error
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_fields(model, ordering):
+    """
+    Поля сортировки для курсора, дополненные первичным ключом, чтобы
+    позиция строки была уникальной. None, если сортировка не годится
+    для курсора: по связи, выражению или полю, допускающему NULL
+    (курсор не умеет сравнивать NULL).
+    """
+    fields = []
+    for name in ordering:
+        if not isinstance(name, str):
+            return None
+        attr = name.lstrip('-')
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if attr != 'pk':
+                return None
+            field = model._meta.pk
+        if field.null or field.is_relation or not field.concrete:
+            return None
+        fields.append((field, name.startswith('-')))
+        if field.primary_key:
+            return fields
+    descending = fields[-1][1] if fields else False
+    fields.append((model._meta.pk, descending))
+    return fields
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация, позиция которой — значения всех полей сортировки
+    последней строки страницы, включая id. Следующая страница выбирается
+    условием «строка после позиции» по всем полям сразу, поэтому равные
+    значения первого поля (например, одинаковые оценки) не требуют
+    смещения, как в `CursorPagination`, и страницы не повторяются.
+    """
+    fields = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse, position = False, None
+        if self.cursor is not None:
+            reverse, position = self.cursor.reverse, self.cursor.position
+
+        queryset = queryset.order_by(*(
+            ('-' if descending != reverse else '') + field.name
+            for field, descending in self.fields
+        ))
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, position, reverse):
+        """
+        Строки после позиции в порядке выборки. Граница первого поля
+        вынесена отдельно, чтобы выборка оставалась диапазоном по индексу.
+        """
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.fields, position):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{field.name}__{lookup}': value})
+            equal[field.name] = value
+        field, descending = self.fields[0]
+        bound = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{field.name}__{bound}': position[0]}) & condition
+
+    def get_position(self, instance):
+        return [field.value_to_string(instance) for field, _ in self.fields]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self.get_position(self.page[-1])
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self.get_position(self.page[0])
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            reverse, position = json.loads(b64decode(encoded.encode()))
+        except (TypeError, ValueError, Base64Error):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.fields)
+                or not all(isinstance(value, str) for value in position)):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=bool(reverse), position=position)
+
+    def encode_cursor(self, cursor):
+        encoded = b64encode(
+            json.dumps([int(cursor.reverse), cursor.position]).encode()
+        ).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Пагинация по номерам страниц, которая переключается на курсорную,
+    если в запросе передан параметр `cursor` (в том числе пустой).
+    Курсор строится по сортировке queryset и id, поэтому стоимость
+    страницы не зависит от её глубины и не требует COUNT(*).
+    Сортировка, для которой курсор не строится (см. `keyset_fields`),
+    остаётся с номерами страниц.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        # Сортировка из extra() (например, по релевантности поиска)
+        # важнее order_by и курсором не поддерживается.
+        ordering = (
+            queryset.query.extra_order_by
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+        )
+        fields = keyset_fields(queryset.model, ordering)
+        if fields is None:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = KeysetPagination()
+        self.cursor_paginator.cursor_query_param = self.cursor_query_param
+        self.cursor_paginator.fields = fields
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
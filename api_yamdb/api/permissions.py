@@ -28,3 +28,12 @@ class AdminOnly(permissions.BasePermission):
         return (request.user.is_authenticated
                 and request.user.is_admin
                 or request.user.is_superuser)
+
+
+class StaffOnly(permissions.BasePermission):
+    """
+    Допускает только модераторов и администраторов.
+    """
+    def has_permission(self, request, view):
+        return (request.user.is_authenticated
+                and (request.user.is_admin or request.user.is_moderator))
@@ -1,13 +1,28 @@
 import re
 from datetime import datetime as d
 
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 from rest_framework.relations import SlugRelatedField
 from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import smart_str
 
-from users.models import User
-from reviews.models import Category, Genre, Title, Review, Comment
+from users.models import User, users_bulk_updated
+from reviews.models import (SCORES, Category, Genre, GenreTitle, Title,
+                            Review, Comment, score_count_field,
+                            titles_bulk_created)
+from . import catalog
+from .filters import prefix_condition
+from .mixins import SparseFieldsetMixin
+
+# /users/me/ и /users/bulk/ не адресуют пользователей.
+RESERVED_USERNAMES = ('me', 'bulk')
+
+DUPLICATE_REVIEW_ERROR = 'Вы не можете оставлять более одного отзыва.'
+BLOCKED_USER_ERROR = 'Пользователь заблокирован администратором.'
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -24,12 +39,33 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
-    )
-    genre = GenreSerializer(read_only=True, many=True)
-    category = CategorySerializer(read_only=True)
+class CatalogSlugRelatedField(SlugRelatedField):
+    """
+    Объект справочника по slug из снимка в памяти, без запроса к базе,
+    пока снимок не старше `CATALOG_MAX_AGE`.
+    """
+
+    def __init__(self, catalog, **kwargs):
+        self.catalog = catalog
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.catalog.by_slug([str(data)]).get(str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return obj
+
+
+class TitleReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Категория и жанры берутся из справочников в памяти: queryset
+    загружает только `category_id` и связи произведения с жанрами.
+    """
+    rating = serializers.IntegerField(read_only=True)
+    genre = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
@@ -37,16 +73,61 @@ class TitleReadSerializer(serializers.ModelSerializer):
             'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
         )
 
+    def catalog_objects(self, catalog, pks):
+        # Один снимок справочника на весь ответ.
+        snapshots = self.__dict__.setdefault('_catalog_snapshots', {})
+        if catalog not in snapshots:
+            snapshots[catalog] = catalog.snapshot()
+        by_pk = snapshots[catalog].by_pk
+        missing = [pk for pk in pks if pk not in by_pk]
+        if missing:
+            # Объект, созданный в другом процессе до смены версии.
+            by_pk = {**by_pk, **catalog.model.objects.in_bulk(missing)}
+        return [by_pk[pk] for pk in pks if pk in by_pk]
+
+    def get_category(self, obj):
+        if obj.category_id is None:
+            return None
+        found = self.catalog_objects(catalog.categories, [obj.category_id])
+        return CategorySerializer(found[0]).data if found else None
+
+    def get_genre(self, obj):
+        links = obj.genretitle_set.all()
+        genres = self.catalog_objects(
+            catalog.genres, [link.genre_id for link in links]
+        )
+        # Порядок жанров модели Genre: от новых к старым.
+        genres.sort(key=lambda genre: genre.pk, reverse=True)
+        return GenreSerializer(genres, many=True).data
+
+
+class ScoreDistributionSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source='reviews_count', read_only=True)
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'scores')
+        count_fields = ('id', 'reviews_count') + tuple(
+            score_count_field(score) for score in SCORES
+        )
+
+    def get_scores(self, obj):
+        return {
+            str(score): count
+            for score, count in obj.score_distribution.items()
+        }
+
 
 class TitleCreateSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CatalogSlugRelatedField(
+        catalog.genres,
         queryset=Genre.objects.all(),
-        slug_field='slug',
         many=True
     )
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
-        slug_field='slug'
+    category = CatalogSlugRelatedField(
+        catalog.categories,
+        queryset=Category.objects.all()
     )
 
     class Meta:
@@ -64,7 +145,83 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """
+    Создание списка произведений: все slug категорий и жанров проверяются
+    по справочникам в памяти, произведения и их жанры пишутся через
+    bulk_create в одной транзакции.
+    """
+    def to_internal_value(self, data):
+        # Ошибки здесь, а не в validate(), чтобы они остались списком
+        # по элементам, а не попали в non_field_errors.
+        items = super().to_internal_value(data)
+        categories = catalog.categories.by_slug(
+            {item['category'] for item in items}
+        )
+        genres = catalog.genres.by_slug(
+            {slug for item in items for slug in item['genre']}
+        )
+        errors = []
+        for item in items:
+            error = {}
+            if item['category'] not in categories:
+                error['category'] = [
+                    f'Категории {item["category"]} не существует.'
+                ]
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                error['genre'] = [
+                    f'Жанра {slug} не существует.' for slug in missing
+                ]
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in items:
+            item['category'] = categories[item['category']]
+            # Повторный slug в списке жанров даёт одну связь.
+            item['genre'] = [
+                genres[slug] for slug in dict.fromkeys(item['genre'])
+            ]
+        return items
+
+    def create(self, validated_data):
+        titles = [
+            Title(**{key: value for key, value in item.items()
+                     if key != 'genre'})
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            Title.objects.bulk_create(titles)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # SQLite не возвращает id из bulk_create, но до конца
+                # транзакции держит блокировку записи: новые строки —
+                # последние по id, в порядке вставки.
+                ids = Title.objects.order_by('-pk').values_list(
+                    'pk', flat=True
+                )[:len(titles)]
+                for title, pk in zip(titles, reversed(ids)):
+                    title.pk = pk
+            links = [
+                GenreTitle(title=title, genre=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            ]
+            GenreTitle.objects.bulk_create(links)
+            titles_bulk_created.send(sender=Title, titles=titles, links=links)
+        return titles
+
+
+class TitleBulkCreateSerializer(TitleCreateSerializer):
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False
+    )
+    category = serializers.SlugField()
+
+    class Meta(TitleCreateSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = SlugRelatedField(read_only=True, slug_field='username')
 
     class Meta:
@@ -72,7 +229,7 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = SlugRelatedField(
         read_only=True,
         slug_field='username',
@@ -81,19 +238,22 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count', 'last_comment_at')
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if request.method != 'POST':
-            return data
 
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if title.reviews.filter(author__id=request.user.id):
-            raise serializers.ValidationError(
-                'Вы не можете оставлять более одного отзыва.')
-        return data
+class ActivitySerializer(serializers.Serializer):
+    """
+    Запись ленты активности автора: отзыв или комментарий.
+    Поля `score` и `review_id` есть только у записей своего типа.
+    """
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField(required=False)
+    text = serializers.CharField()
+    score = serializers.IntegerField(required=False)
+    pub_date = serializers.DateTimeField()
 
 
 class RegistrationSerializer(serializers.Serializer):
@@ -104,27 +264,45 @@ class RegistrationSerializer(serializers.Serializer):
         model = User
         fields = ['email', 'username']
 
-    def create(self, validated_data):
+    def validate(self, attrs):
+        """
+        Один запрос находит и пользователя повторной регистрации, и чужие
+        ник или почту. Запрос выполняется до транзакции записи: на SQLite
+        чтение в начале транзакции не даёт ей дождаться блокировки.
+        """
+        email = attrs.get('email')
+        username = attrs.get('username')
+        users = list(
+            User.all_objects.filter(Q(username=username) | Q(email=email))[:2]
+        )
+        # Ник и почта удалённого пользователя заняты до его очистки.
+        if users and (len(users) > 1 or users[0].username != username
+                      or users[0].email != email
+                      or users[0].deleted_at is not None):
+            raise serializers.ValidationError(
+                {'username': ['Не ваша почта или ник!']}
+            )
+        if users and users[0].blocked:
+            raise serializers.ValidationError(
+                {'username': [BLOCKED_USER_ERROR]}
+            )
+        self.user = users[0] if users else None
+        return attrs
 
-        email = validated_data.get('email')
-        username = validated_data.get('username')
-        if User.objects.filter(email=email, username=username).exists():
-            return User.objects.filter(email=email, username=username)
-        else:
-            if (User.objects.filter(username=username).exists()
-                    or User.objects.filter(email=email).exists()):
-                raise serializers.ValidationError(
-                    {'username': ['Не ваша почта или ник!']}
-                )
+    def create(self, validated_data):
+        # Одновременную регистрацию с теми же данными отсекают
+        # уникальные ограничения, IntegrityError обрабатывает view.
+        if self.user is not None:
+            return self.user
         return User.objects.create_user(
-            email=email,
-            username=username,
+            email=validated_data.get('email'),
+            username=validated_data.get('username'),
             is_active=False,
         )
 
     def validate_username(self, username):
 
-        if username == 'me':
+        if username in RESERVED_USERNAMES:
             raise serializers.ValidationError('Недопустимый username!')
         if not re.match(r'^[\w.@+-]+\Z', username):
             raise serializers.ValidationError(
@@ -150,10 +328,12 @@ class VerifyUserSerializer(serializers.Serializer):
         user = get_object_or_404(User, username=username)
         if not default_token_generator.check_token(user, code):
             raise serializers.ValidationError('Некорректный код')
+        if user.blocked:
+            raise serializers.ValidationError(BLOCKED_USER_ERROR)
         return code
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     username = serializers.CharField(max_length=150, required=True)
     first_name = serializers.CharField(max_length=150, required=False)
     last_name = serializers.CharField(max_length=150, required=False)
@@ -171,7 +351,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
     def validate_email(self, email):
-        if User.objects.filter(email=email).exists():
+        if User.all_objects.filter(email=email).exists():
             raise serializers.ValidationError('Эта почта уже занята!')
         return email
 
@@ -182,10 +362,10 @@ class UserSerializer(serializers.ModelSerializer):
         return role
 
     def validate_username(self, username):
-        if User.objects.filter(username=username).exists():
+        if User.all_objects.filter(username=username).exists():
             raise serializers.ValidationError('Этот username уже занят!')
-        if username == 'me':
-            return 'Некорректный username'
+        if username in RESERVED_USERNAMES:
+            raise serializers.ValidationError('Недопустимый username!')
         if not re.match(r'^[\w.@+-]+\Z', username):
             raise serializers.ValidationError(
                 'Недопустимые символы')
@@ -227,3 +407,105 @@ class UserMeSerializer(UserSerializer):
         except Exception:
             raise serializers.ValidationError('Пользователя не существует')
         return username
+
+
+class UserBulkChangesSerializer(serializers.Serializer):
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    is_active = serializers.BooleanField(required=False)
+    first_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True
+    )
+    last_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True
+    )
+    bio = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Не указано ни одного поля.')
+        return attrs
+
+
+class UserBulkFilterSerializer(serializers.Serializer):
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    is_active = serializers.BooleanField(required=False)
+    search = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                'Пустой фильтр выбирает всех пользователей.'
+            )
+        return attrs
+
+
+class UserBulkUpdateSerializer(serializers.Serializer):
+    """
+    Массовое изменение пользователей, выбранных списком `usernames` или
+    фильтром `filter`. Пользователи находятся одним запросом, изменения
+    `changes` применяются одним UPDATE.
+    """
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150), required=False,
+        allow_empty=False, max_length=settings.USER_BULK_UPDATE_MAX
+    )
+    filter = UserBulkFilterSerializer(required=False)
+    changes = UserBulkChangesSerializer()
+
+    def validate(self, attrs):
+        if ('usernames' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError(
+                'Укажите либо usernames, либо filter.'
+            )
+        if 'usernames' in attrs:
+            usernames = list(dict.fromkeys(attrs['usernames']))
+            found = dict(User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+            attrs['targets'] = [
+                (username, found.get(username)) for username in usernames
+            ]
+            return attrs
+        conditions = dict(attrs['filter'])
+        search = conditions.pop('search', None)
+        users = User.objects.filter(**conditions)
+        if search:
+            users = users.filter(prefix_condition(
+                ('username_search', 'email_search'), search
+            ))
+        limit = settings.USER_BULK_UPDATE_MAX
+        attrs['targets'] = list(
+            users.order_by('pk').values_list('username', 'pk')[:limit + 1]
+        )
+        if len(attrs['targets']) > limit:
+            raise serializers.ValidationError({'filter': [
+                f'Фильтр выбирает больше {limit} пользователей.'
+            ]})
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Результат по каждому пользователю: `updated`, `not_found` или
+        `skipped` — администратор не меняет себе роль и активность.
+        """
+        changes = dict(validated_data['changes'])
+        if 'is_active' in changes:
+            # Деактивацию администратором не отменяет код подтверждения.
+            changes['blocked'] = not changes['is_active']
+        actor = self.context['request'].user
+        protected = bool({'role', 'is_active'} & changes.keys())
+        results, user_ids = [], []
+        for username, pk in validated_data['targets']:
+            if pk is None:
+                result = 'not_found'
+            elif pk == actor.pk and protected:
+                result = 'skipped'
+            else:
+                result = 'updated'
+                user_ids.append(pk)
+            results.append({'username': username, 'status': result})
+        if user_ids:
+            with transaction.atomic():
+                User.objects.filter(pk__in=user_ids).update(**changes)
+                users_bulk_updated.send(sender=User, user_ids=user_ids)
+        return {'updated': len(user_ids), 'results': results}
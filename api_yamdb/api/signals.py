@@ -0,0 +1,194 @@
+"""
+Отслеживание изменений данных, от которых зависят ответы API.
+
+Версии ресурсов увеличиваются после фиксации транзакции, чтобы
+читатель не успел закэшировать под новой версией ещё старые данные.
+Вместе с версией `facets` патчем обновляется битовый индекс фасетов.
+"""
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+
+from reviews import deletion
+from reviews.aggregates import titles_recomputed
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, titles_bulk_created)
+from users.models import User, users_bulk_updated
+from .authentication import user_resource
+from .cache import bump_version
+from .facets import FACETS_RESOURCE, title_facets
+
+
+def changed(*resources, patch=None):
+    def bump():
+        versions = bump_version(*resources)
+        if FACETS_RESOURCE in versions:
+            title_facets.advance(versions[FACETS_RESOURCE], patch)
+    transaction.on_commit(bump)
+
+
+def category_saved(sender, instance, **kwargs):
+    pk, slug = instance.pk, instance.slug
+    changed('categories', 'titles', FACETS_RESOURCE,
+            patch=lambda index: index.category_saved(pk, slug))
+
+
+def category_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    changed('categories', 'titles', FACETS_RESOURCE,
+            patch=lambda index: index.category_deleted(pk))
+
+
+def genre_saved(sender, instance, **kwargs):
+    pk, slug = instance.pk, instance.slug
+    changed('genres', 'titles', FACETS_RESOURCE,
+            patch=lambda index: index.genre_saved(pk, slug))
+
+
+def genre_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    changed('genres', 'titles', FACETS_RESOURCE,
+            patch=lambda index: index.genre_deleted(pk))
+
+
+def title_saved(sender, instance, **kwargs):
+    if instance.deleted_at is not None:
+        title_deleted(sender, instance)
+        return
+    row = (instance.pk, instance.name, instance.category_id, instance.year)
+    changed('titles', FACETS_RESOURCE,
+            patch=lambda index: index.title_saved(*row))
+
+
+def title_deleted(sender, instance, **kwargs):
+    # Отзывы удалённого произведения больше не отдаются.
+    pk = instance.pk
+    changed('titles', f'reviews:{pk}', FACETS_RESOURCE,
+            patch=lambda index: index.title_deleted(pk))
+
+
+def genre_title_saved(sender, instance, **kwargs):
+    title_ids, genre_ids = [instance.title_id], [instance.genre_id]
+    changed('titles', FACETS_RESOURCE,
+            patch=lambda index: index.genres_added(title_ids, genre_ids))
+
+
+def genre_title_deleted(sender, instance, **kwargs):
+    title_ids, genre_ids = [instance.title_id], [instance.genre_id]
+    changed('titles', FACETS_RESOURCE,
+            patch=lambda index: index.genres_removed(title_ids, genre_ids))
+
+
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        title_ids, genre_ids = list(pk_set or ()), [instance.pk]
+        if action == 'post_clear':
+            genre_id = instance.pk
+            changed('titles', FACETS_RESOURCE,
+                    patch=lambda index: index.genre_cleared(genre_id))
+            return
+    else:
+        title_ids = [instance.pk]
+        genre_ids = list(pk_set) if pk_set is not None else None
+    if action == 'post_add':
+        changed('titles', FACETS_RESOURCE,
+                patch=lambda index: index.genres_added(title_ids, genre_ids))
+    else:
+        changed('titles', FACETS_RESOURCE,
+                patch=lambda index: index.genres_removed(title_ids,
+                                                         genre_ids))
+
+
+def titles_bulk_saved(sender, titles, links, **kwargs):
+    rows = [(title.pk, title.name, title.category_id, title.year)
+            for title in titles]
+    pairs = [(link.title_id, link.genre_id) for link in links]
+
+    def patch(index):
+        for row in rows:
+            index.title_saved(*row)
+        for title_id, genre_id in pairs:
+            index.genres_added([title_id], [genre_id])
+    changed('titles', FACETS_RESOURCE, patch=patch)
+
+
+def review_changed(sender, instance, **kwargs):
+    changed('titles', f'reviews:{instance.title_id}')
+
+
+def comment_changed(sender, instance, **kwargs):
+    # Отзыв показывает количество и дату последнего комментария.
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = Review.objects.filter(
+            pk=instance.review_id
+        ).values_list('title_id', flat=True).first()
+    resources = [f'comments:{instance.review_id}']
+    if title_id is not None:
+        resources.append(f'reviews:{title_id}')
+    changed(*resources)
+
+
+def ratings_recomputed(sender, **kwargs):
+    # Отложенный пересчёт меняет рейтинг в ответах с произведениями.
+    changed('titles')
+
+
+def content_purged(sender, title_ids, review_ids, **kwargs):
+    changed(*(f'reviews:{pk}' for pk in title_ids),
+            *(f'comments:{pk}' for pk in review_ids))
+
+
+def remember_username(sender, instance, **kwargs):
+    instance._stored_username = instance.__dict__.get('username')
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Версия пользователя сбрасывает его записи в кэше аутентификации,
+    # а `authors` — ответы с отзывами и комментариями, где виден
+    # username: только если он изменился или пользователь удалён и его
+    # записи скрыты.
+    resources = [user_resource(instance.pk)]
+    renamed = (
+        not created
+        and (update_fields is None or 'username' in update_fields)
+        and instance.__dict__.get('username') != instance._stored_username
+    )
+    if renamed or instance.__dict__.get('deleted_at') is not None:
+        resources.append('authors')
+    instance._stored_username = instance.__dict__.get('username')
+    changed(*resources)
+
+
+def user_deleted(sender, instance, **kwargs):
+    changed('authors', user_resource(instance.pk))
+
+
+def users_bulk_saved(sender, user_ids, **kwargs):
+    changed(*(user_resource(pk) for pk in user_ids))
+
+
+post_save.connect(category_saved, sender=Category)
+post_delete.connect(category_deleted, sender=Category)
+post_save.connect(genre_saved, sender=Genre)
+post_delete.connect(genre_deleted, sender=Genre)
+post_save.connect(title_saved, sender=Title)
+post_delete.connect(title_deleted, sender=Title)
+post_save.connect(genre_title_saved, sender=GenreTitle)
+post_delete.connect(genre_title_deleted, sender=GenreTitle)
+titles_bulk_created.connect(titles_bulk_saved, sender=Title)
+m2m_changed.connect(title_genres_changed, sender=Title.genre.through)
+post_save.connect(review_changed, sender=Review)
+post_delete.connect(review_changed, sender=Review)
+post_save.connect(comment_changed, sender=Comment)
+post_delete.connect(comment_changed, sender=Comment)
+titles_recomputed.connect(ratings_recomputed)
+deletion.content_purged.connect(content_purged)
+post_init.connect(remember_username, sender=User)
+post_save.connect(user_saved, sender=User)
+post_delete.connect(user_deleted, sender=User)
+users_bulk_updated.connect(users_bulk_saved, sender=User)
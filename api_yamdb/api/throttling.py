@@ -0,0 +1,101 @@
+"""
+Ограничение частоты запросов по алгоритму token bucket.
+
+Ведро вмещает `n` запросов и пополняется равномерно со скоростью
+`n / период`, поэтому короткий всплеск допускается, а устойчивый поток
+ограничивается средней скоростью. Состояние ведра хранится в кэше
+`THROTTLE_CACHE`, общем для процессов при файловом backend. Чтение
+и запись состояния не атомарны: при гонке ведро может пропустить лишний
+запрос, что для ограничения частоты допустимо.
+
+Ставки задаются в `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']` в формате
+DRF (`'20/min'`), `None` отключает ограничение.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """`'20/min'` -> (20, 60); `None` -> `None`."""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Базовое ведро: подклассы задают `scope` и `get_ident_key()`, который
+    возвращает ключ ведра или `None`, если запрос не ограничивается.
+    """
+    scope = None
+    timer = time.time
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = parse_rate(
+            api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        )
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        capacity, period = rate
+        refill = capacity / period
+        key = 'throttle:{}:{}'.format(
+            self.scope, hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+        )
+        cache = caches[settings.THROTTLE_CACHE]
+        now = self.timer()
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            return False
+        cache.set(key, (tokens - 1, now), timeout=period)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена с одного адреса."""
+    scope = 'auth_ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена для одного username."""
+    scope = 'auth_username'
+
+    def get_ident_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username.lower()
+
+
+class ContentWriteThrottle(TokenBucketThrottle):
+    """Запись отзывов и комментариев одним пользователем."""
+    scope = 'content_write'
+
+    def get_ident_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return self.get_ident(request)
@@ -1,8 +1,11 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenRefreshView
+from .throttling import AuthIPThrottle
 from .views import (CategoryViewSet, GenreViewSet, TitleViewSet,
                     ReviewViewSet, CommentViewSet, RegistrationAPIView,
-                    UserActivateAPIView, UserViewSet, user_me, user_username)
+                    UserActivateAPIView, UserViewSet, user_activity,
+                    user_me, user_me_activity, user_username)
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -18,9 +21,16 @@ router.register(
 )
 router.register(r'titles', TitleViewSet, basename='titles')
 urlpatterns = [
+    path('v1/users/me/activity/', user_me_activity),
+    path('v1/users/<username>/activity/', user_activity),
     path('v1/users/me/', user_me),
+    path('v1/users/bulk/', UserViewSet.as_view({'post': 'bulk'})),
     path('v1/users/<username>/', user_username),
     path('v1/auth/signup/', RegistrationAPIView.as_view()),
     path('v1/auth/token/', UserActivateAPIView.as_view()),
+    path(
+        'v1/auth/token/refresh/',
+        TokenRefreshView.as_view(throttle_classes=(AuthIPThrottle,))
+    ),
     path('v1/', include(router.urls)),
 ]
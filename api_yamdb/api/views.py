@@ -1,33 +1,67 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-
-from reviews.models import Category, Genre, Title, Review, Comment
-from .permissions import AdminOrReadOnly, AdminOnly, IsAuthorOrStaffOrReadOnly
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from reviews.deletion import mark_deleted
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+from users.outbox import queue_email
+from .activity import author_activity
+from .catalog import categories, genres
+from .facets import FacetPage
+from .exports import EXPORT_FORMATS, export_reviews
+from .permissions import (AdminOrReadOnly, AdminOnly,
+                          IsAuthorOrStaffOrReadOnly, StaffOnly)
+from .filters import PrefixSearchFilter, StableOrderingFilter, TitleFilter
+from .mixins import (CachedListMixin, CachedRetrieveMixin, CatalogListMixin,
+                     ConditionalListMixin, ConditionalRetrieveMixin,
+                     ListCreateDestroyViewSet, NestedResourceMixin,
+                     SparseQuerysetMixin)
+from .pagination import PageNumberOrCursorPagination
+from .throttling import (AuthIPThrottle, AuthUsernameThrottle,
+                         ContentWriteThrottle)
 from .serializers import (ReviewSerializer, CommentSerializer,
                           TitleReadSerializer, TitleCreateSerializer,
                           GenreSerializer, CategorySerializer,
                           RegistrationSerializer, VerifyUserSerializer,
                           UserSerializer, UserPATCHSerializer,
-                          UserMeSerializer)
+                          UserMeSerializer, ScoreDistributionSerializer,
+                          ActivitySerializer,
+                          TitleBulkCreateSerializer, DUPLICATE_REVIEW_ERROR,
+                          UserBulkUpdateSerializer)
 
 
 User = get_user_model()
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+def is_duplicate_review(error):
+    # PostgreSQL называет нарушенное ограничение, SQLite — его столбцы.
+    message = str(error)
+    return (
+        'one_author_review' in message
+        or 'reviews_review.author_id, reviews_review.title_id' in message
+    )
+
+
+class CategoryViewSet(ConditionalListMixin, CachedListMixin,
+                      CatalogListMixin, ListCreateDestroyViewSet):
+    cache_resource = 'categories'
+    etag_resources = ('categories',)
+    catalog = categories
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
@@ -37,7 +71,11 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     search_fields = ('$name',)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ConditionalListMixin, CachedListMixin,
+                   CatalogListMixin, ListCreateDestroyViewSet):
+    cache_resource = 'genres'
+    etag_resources = ('genres',)
+    catalog = genres
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
@@ -47,12 +85,29 @@ class GenreViewSet(ListCreateDestroyViewSet):
     search_fields = ('$name',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        Avg('reviews__score')
-    ).order_by('name')
+class TitleViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                   CachedListMixin, CachedRetrieveMixin, SparseQuerysetMixin,
+                   viewsets.ModelViewSet):
+    cache_resource = 'titles'
+    etag_resources = ('titles',)
+    queryset = Title.objects.order_by('name')
+    sparse_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating',),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category',),
+    }
+    # Категория и жанры сериализуются из справочников в памяти, поэтому
+    # из базы нужны только id категории и связи с жанрами.
+    sparse_prefetch_related = {'genre': Prefetch(
+        'genretitle_set', queryset=GenreTitle.objects.only('title', 'genre')
+    )}
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = PageNumberOrCursorPagination
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           AdminOrReadOnly,)
 
@@ -61,58 +116,173 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleCreateSerializer
         return TitleReadSerializer
 
+    def paginate_queryset(self, queryset):
+        # Большой результат фасетов: страница выбирается по индексу,
+        # который хранит произведения в том же порядке по названию.
+        match = getattr(self.request, 'title_facet_match', None)
+        if match is not None:
+            queryset = FacetPage(match, queryset)
+        return super().paginate_queryset(queryset)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Ожидается список произведений.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > settings.TITLE_BULK_CREATE_MAX:
+            return Response(
+                {'detail': 'За один запрос можно создать не более '
+                           f'{settings.TITLE_BULK_CREATE_MAX} произведений.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = TitleBulkCreateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        return Response(
+            {'count': len(titles), 'ids': [title.pk for title in titles]},
+            status=status.HTTP_201_CREATED
+        )
+
+    def perform_destroy(self, instance):
+        mark_deleted(instance)
+
+    @action(detail=True, url_path='score-distribution')
+    def score_distribution(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only(*ScoreDistributionSerializer.Meta.count_fields),
+            pk=pk
+        )
+        return Response(ScoreDistributionSerializer(title).data)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                    NestedResourceMixin, SparseQuerysetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    etag_resources = ('authors', 'reviews:{title_id}')
+    pagination_class = PageNumberOrCursorPagination
+    sparse_columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comments_count': ('comments_count',),
+        'last_comment_at': ('last_comment_at',),
+    }
+    sparse_select_related = {'author': 'author'}
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comments_count',
+                       'last_comment_at')
+    ordering = ('-id',)
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorOrStaffOrReadOnly)
+    throttle_classes = (ContentWriteThrottle,)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Второй отзыв автора отсекает ограничение one_author_review,
+        # без отдельного запроса на проверку.
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author=self.request.user, title=self.get_title()
+                )
+        except IntegrityError as error:
+            if not is_duplicate_review(error):
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW_ERROR]
+            })
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        # Отзывы удалённых пользователей скрыты до очистки.
+        return Review.objects.filter(
+            title=self.get_title(), author__deleted_at__isnull=True
+        )
+
+    @action(detail=False, permission_classes=(StaffOnly,))
+    def export(self, request, title_id=None):
+        # Параметр `format` занят DRF, поэтому формат выгрузки в `output`.
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': [
+                f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}.'
+            ]})
+        title = self.get_title()
+        with_comments = request.query_params.get('comments') in (
+            '1', 'true'
+        )
+        response = StreamingHttpResponse(
+            export_reviews(
+                title.pk, output, with_comments,
+                settings.REVIEW_EXPORT_CHUNK_SIZE
+            ),
+            content_type=f'{EXPORT_FORMATS[output]}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="title-{title.pk}-reviews.{output}"'
+        )
+        return response
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                     NestedResourceMixin, SparseQuerysetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    etag_resources = ('authors', 'comments:{review_id}')
+    pagination_class = PageNumberOrCursorPagination
+    sparse_columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'pub_date': ('pub_date',),
+    }
+    sparse_select_related = {'author': 'author'}
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ('pub_date',)
+    ordering = ('-id',)
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorOrStaffOrReadOnly)
+    throttle_classes = (ContentWriteThrottle,)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return Comment.objects.filter(review=review)
+        return Comment.objects.filter(
+            review=self.get_review(), author__deleted_at__isnull=True
+        )
 
 
 class RegistrationAPIView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
     serializer_class = RegistrationSerializer
 
-    def post(self, request):
-        serializer = self.serializer_class(data=request.data)
+    def register(self, data):
+        serializer = self.serializer_class(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        # Письмо попадает в исходящую очередь в одной транзакции
+        # с пользователем и отправляется после фиксации.
+        with transaction.atomic():
+            user = serializer.save()
+            confirmation_code = default_token_generator.make_token(user)
 
-        user = get_object_or_404(User, username=request.data.get('username'))
-        confirmation_code = default_token_generator.make_token(user)
+            subject = 'YaMDB'
+            message = 'Ваш очень секретный код - ' + confirmation_code
 
-        subject = 'YaMDB'
-        message = 'Ваш очень секретный код - ' + confirmation_code
-
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email, ],
-            fail_silently=False,
-        )
+            queue_email(subject, message, user.email)
+        return user
 
+    def post(self, request):
+        try:
+            user = self.register(request.data)
+        except IntegrityError:
+            # Одновременная регистрация с теми же данными успела раньше,
+            # повтор найдёт её пользователя.
+            user = self.register(request.data)
         return Response(
             {'username': user.username, 'email': user.email},
             status=status.HTTP_200_OK
@@ -121,6 +291,7 @@ class RegistrationAPIView(APIView):
 
 class UserActivateAPIView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
     serializer_class = VerifyUserSerializer
 
     def post(self, request):
@@ -133,16 +304,31 @@ class UserActivateAPIView(APIView):
             refresh = RefreshToken.for_user(user)
             token = str(refresh.access_token)
         return Response({
-            'token': token
+            'token': token,
+            'refresh': str(refresh),
         }, status=status.HTTP_201_CREATED)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = (AdminOnly,)
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('username',)
+    sparse_columns = {
+        name: (name,) for name in UserSerializer.Meta.fields
+    }
+    filter_backends = (PrefixSearchFilter,)
+    prefix_search_fields = ('username_search', 'email_search')
+
+    def perform_destroy(self, instance):
+        mark_deleted(instance)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = UserBulkUpdateSerializer(
+            data=request.data, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
 
 
 @api_view(['GET', 'PATCH'])
@@ -157,8 +343,9 @@ def user_me(request):
         return Response(serializer.data, status=status.HTTP_400_BAD_REQUEST)
     if not request.user.is_authenticated:
         return Response(status=status.HTTP_401_UNAUTHORIZED)
-    me = get_object_or_404(User, username=request.user)
-    serializer = UserSerializer(me, many=False)
+    serializer = UserSerializer(
+        request.user, many=False, context={'request': request}
+    )
     return Response(serializer.data)
 
 
@@ -167,7 +354,9 @@ def user_me(request):
 def user_username(request, username):
     user = get_object_or_404(User, username=username)
     if request.method == 'GET':
-        serializer = UserPATCHSerializer(user, many=False)
+        serializer = UserPATCHSerializer(
+            user, many=False, context={'request': request}
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
     if request.method == 'PATCH':
         serializer = UserSerializer(user, data=request.data,
@@ -176,5 +365,35 @@ def user_username(request, username):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.data, status=status.HTTP_400_BAD_REQUEST)
-    user.delete()
+    mark_deleted(user)
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def activity_response(request, author):
+    page, cursor = author_activity(
+        author.pk, api_settings.PAGE_SIZE,
+        request.query_params.get('cursor')
+    )
+    next_url = None
+    if cursor is not None:
+        next_url = replace_query_param(
+            request.build_absolute_uri(), 'cursor', cursor
+        )
+    return Response({
+        'next': next_url,
+        'results': ActivitySerializer(page, many=True).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def user_me_activity(request):
+    return activity_response(request, request.user)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def user_activity(request, username):
+    return activity_response(
+        request, get_object_or_404(User.objects.only('pk'), username=username)
+    )
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
@@ -76,6 +77,93 @@ DATABASES = {
 }
 
 
+# Cache
+# Ответы API кэшируются в памяти процесса под версией ресурса, а сами
+# версии (api.cache) должны быть общими для всех процессов приложения:
+# по ним процессы узнают об изменениях, сделанных в других процессах.
+# Файловый кэш разделяют процессы одного сервера; для нескольких серверов
+# нужен Memcached или Redis, где к тому же incr атомарен.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api_yamdb',
+    },
+    # Общий для процессов: атомарный incr и без вытеснения записей.
+    'versions': {
+        'BACKEND': 'api.backends.VersionFileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'versions'),
+        'TIMEOUT': None,
+    },
+}
+
+# Кэш версий ресурсов API и времени их изменения.
+API_VERSION_CACHE = 'versions'
+
+# Справочники категорий и жанров (api.catalog): slug при записи
+# произведения проверяются по снимку в памяти, если он моложе
+# CATALOG_MAX_AGE секунд, иначе снимок сначала перечитывается из базы.
+CATALOG_MAX_AGE = 30
+
+# Ответы API инвалидируются сменой версии ресурса, таймаут лишь
+# ограничивает время жизни записей устаревших версий.
+API_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Битовый индекс фасетов произведений. Результат до
+# TITLE_FACET_INDEX_MAX_IDS фильтруется списком id (столько помещается
+# в один запрос с учётом лимита параметров SQLite), страница большего
+# результата выбирается по индексу и читается по первичному ключу.
+TITLE_FACET_INDEX = True
+TITLE_FACET_INDEX_MAX_IDS = 900
+
+# Наибольшее число произведений в одном запросе к /titles/bulk/.
+TITLE_BULK_CREATE_MAX = 10000
+
+# Наибольшее число пользователей, изменяемых одним запросом к
+# /users/bulk/.
+USER_BULK_UPDATE_MAX = 500
+
+# Отложенный пересчёт рейтинга: запись отзыва только ставит произведение
+# в очередь, которую разбирает `manage.py drain_ratings` раз в
+# RATING_DRAIN_INTERVAL секунд пачками по RATING_DRAIN_BATCH_SIZE.
+# Если очередь отстала больше чем на RATING_MAX_STALENESS секунд,
+# запрос с отзывом сразу пересчитывает своё произведение (None — всегда
+# только ставить в очередь).
+RATING_WRITE_BEHIND = False
+RATING_DRAIN_INTERVAL = 5
+RATING_DRAIN_BATCH_SIZE = 500
+RATING_MAX_STALENESS = 60
+
+# Отложенное удаление (reviews.deletion): DELETE произведения или
+# пользователя только помечает его удалённым, а отзывы и комментарии
+# удаляет `manage.py purge_deleted` раз в DEFERRED_DELETION_INTERVAL
+# секунд транзакциями по DEFERRED_DELETION_CHUNK_SIZE строк. Включайте,
+# только если `purge_deleted` запущена рядом с сервером, иначе помеченные
+# объекты копятся в базе. False — удалять сразу в запросе.
+DEFERRED_DELETION = False
+DEFERRED_DELETION_INTERVAL = 30
+DEFERRED_DELETION_CHUNK_SIZE = 500
+
+# Исходящая очередь писем (users.outbox). Письма отправляет
+# `manage.py send_outbox` пачками по OUTBOX_BATCH_SIZE. При
+# OUTBOX_SEND_ON_COMMIT запрос сам делает первую попытку сразу после
+# фиксации транзакции, и время ответа зависит от почтового сервера.
+# Неудачная попытка повторяется через OUTBOX_RETRY_BACKOFF * 2^(n-1)
+# секунд (не больше OUTBOX_RETRY_MAX_DELAY), после OUTBOX_MAX_ATTEMPTS
+# попыток письмо переходит в состояние dead.
+OUTBOX_SEND_ON_COMMIT = False
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_INTERVAL = 5
+OUTBOX_LEASE = 300
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 30
+OUTBOX_RETRY_MAX_DELAY = 3600
+
+# Строк, читаемых из базы и отдаваемых клиенту за раз при выгрузке
+# отзывов произведения.
+REVIEW_EXPORT_CHUNK_SIZE = 2000
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -93,10 +181,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Клиент обновляет короткоживущий access-токен через
+# /api/v1/auth/token/refresh/, не запрашивая код подтверждения заново.
+# Refresh-токен при обновлении заменяется новым, старый попадает
+# в чёрный список; просроченные записи удаляет
+# `manage.py flushexpiredtokens`.
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Сколько проверенных токенов с их пользователями хранит в памяти
+# каждый процесс (api.authentication).
+JWT_AUTH_CACHE_SIZE = 10000
 DEFAULT_FROM_EMAIL = 'Tech Support <YaMDB@support.ru>'
 
 REST_FRAMEWORK = {
@@ -105,13 +204,28 @@ REST_FRAMEWORK = {
         'api.permissions.IsAuthorOrStaffOrReadOnly',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Ставки ведер api.throttling: auth_* — регистрация, получение
+    # и обновление токена, content_write — запись отзывов и комментариев.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '60/min',
+        'auth_username': '10/min',
+        'content_write': '120/min',
+    },
+    # Число доверенных прокси перед приложением: адрес клиента для
+    # ограничений берётся из X-Forwarded-For с учётом только их записей.
+    # 0 — приложение принимает соединения напрямую, используется
+    # REMOTE_ADDR, а подделанный клиентом X-Forwarded-For игнорируется.
+    'NUM_PROXIES': 0,
 }
 
+# Кэш, в котором хранятся ведра ограничения частоты запросов.
+THROTTLE_CACHE = 'default'
+
 # Internationalization
 
 LANGUAGE_CODE = 'ru'
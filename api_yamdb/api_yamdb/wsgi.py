@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_wsgi_application()
+
+# Индекс фасетов строится при запуске, а не первым запросом с фильтром.
+from api.facets import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,259 @@
+"""
+Хранимые агрегаты оценок произведений и комментариев отзывов.
+
+Сумма оценок, количество отзывов, рейтинг и гистограмма оценок хранятся
+прямо в `Title` и изменяются одним UPDATE при записи отзыва, поэтому
+чтение рейтинга не требует группировки по таблице отзывов. Так же
+в `Review` хранятся количество комментариев и дата последнего из них.
+
+В режиме отложенной записи (`RATING_WRITE_BEHIND`) отзыв только
+отмечает произведение в очереди `DirtyTitle`, а агрегаты пересчитывает
+пачками команда `drain_ratings`.
+
+Отзывы и комментарии пользователя, помеченного удалённым, скрыты из API,
+но остаются в агрегатах до очистки `purge_deleted`: их одинаково
+учитывают изменения по одной записи, пересчёт и проверка, поэтому
+результат не зависит от того, успел ли кто-то пересчитать агрегаты.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Case, Count, F, IntegerField, Min, OuterRef, Q,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import (SCORES, Comment, DirtyTitle, Review, Title,
+                     score_count_field)
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после пересчёта агрегатов из очереди или командой
+# `recount_ratings` с аргументом `title_ids` (None — все произведения),
+# чтобы сбросить закэшированные ответы с рейтингом.
+titles_recomputed = Signal()
+
+
+def rating_expression(score_sum, reviews_count):
+    """
+    Рейтинг как целая часть средней оценки, `None` для произведений
+    без отзывов.
+    """
+    return Case(
+        When(Q(**{f'{reviews_count}__lte': 0}), then=Value(None)),
+        default=F(score_sum) / F(reviews_count),
+        output_field=IntegerField(),
+    )
+
+
+def apply_review_change(title_id, old_score=None, new_score=None):
+    """
+    Атомарно переносит в агрегаты произведения изменение одного отзыва:
+    появление (`new_score`), удаление (`old_score`) или смену оценки.
+    """
+    if old_score == new_score:
+        return
+    score_delta = (new_score or 0) - (old_score or 0)
+    count_delta = (new_score is not None) - (old_score is not None)
+    new_sum = F('score_sum') + score_delta
+    new_count = F('reviews_count') + count_delta
+    changes = {
+        'score_sum': new_sum,
+        'reviews_count': new_count,
+        'rating': Case(
+            When(reviews_count__lte=-count_delta, then=Value(None)),
+            default=new_sum / new_count,
+            output_field=IntegerField(),
+        ),
+    }
+    if old_score is not None:
+        field = score_count_field(old_score)
+        changes[field] = F(field) - 1
+    if new_score is not None:
+        field = score_count_field(new_score)
+        changes[field] = F(field) + 1
+    Title.objects.filter(pk=title_id).update(**changes)
+
+
+def latest_comment_date():
+    """Дата последнего комментария отзыва для UPDATE по отзывам."""
+    return Subquery(
+        Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by('-id').values('pub_date')[:1]
+    )
+
+
+def apply_comment_added(review_id, pub_date):
+    """Учитывает в отзыве новый комментарий."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + 1,
+        last_comment_at=Case(
+            When(last_comment_at__gt=pub_date, then=F('last_comment_at')),
+            default=Value(pub_date),
+        ),
+    )
+
+
+def apply_comment_removed(review_id, pub_date):
+    """
+    Учитывает в отзыве удалённый комментарий. Дата последнего
+    комментария ищется заново, только если удалён последний.
+    """
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') - 1,
+        last_comment_at=Case(
+            When(last_comment_at__gt=pub_date, then=F('last_comment_at')),
+            default=latest_comment_date(),
+        ),
+    )
+
+
+def recompute_review_comments(review_ids):
+    """Пересчитывает количество и дату последнего комментария с нуля."""
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')
+    ).order_by().values('review')
+    Review.objects.filter(pk__in=review_ids).update(
+        comments_count=Coalesce(
+            Subquery(comments.annotate(total=Count('pk')).values('total')),
+            0
+        ),
+        last_comment_at=latest_comment_date(),
+    )
+
+
+def recompute_title_aggregates(title_ids=None):
+    """
+    Пересчитывает агрегаты с нуля по таблице отзывов.
+    Без `title_ids` пересчитываются все произведения.
+    """
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    counts = {
+        score_count_field(score): Coalesce(
+            Subquery(
+                reviews.filter(score=score).annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            0
+        )
+        for score in SCORES
+    }
+    with transaction.atomic():
+        titles.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            **counts
+        )
+        titles.update(rating=rating_expression('score_sum', 'reviews_count'))
+
+
+def find_inconsistent_titles(title_ids=None, chunk_size=2000):
+    """
+    Сверяет хранимые агрегаты с отзывами и возвращает расхождения в виде
+    (id произведения, хранимые значения, фактические значения), где
+    значения — сумма, количество, рейтинг и счётчики оценок от 1 до 10.
+    """
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    buckets = [score_count_field(score) for score in SCORES]
+    rows = titles.order_by('pk').annotate(
+        actual_sum=Coalesce(Sum('reviews__score'), 0),
+        actual_count=Count('reviews'),
+        **{
+            f'actual_{score}': Count('reviews', filter=Q(reviews__score=score))
+            for score in SCORES
+        }
+    ).values_list(
+        'pk', 'score_sum', 'reviews_count', 'rating', *buckets,
+        'actual_sum', 'actual_count', *(f'actual_{score}' for score in SCORES)
+    )
+    size = 3 + len(buckets)
+    for pk, *values in rows.iterator(chunk_size=chunk_size):
+        stored, actual = tuple(values[:size]), values[size:]
+        actual_sum, actual_count = actual[:2]
+        actual_rating = actual_sum // actual_count if actual_count else None
+        actual = (actual_sum, actual_count, actual_rating, *actual[2:])
+        if stored != actual:
+            yield pk, stored, actual
+
+
+def mark_titles_dirty(title_ids):
+    """
+    Ставит произведения в очередь пересчёта. Если очередь отстаёт больше
+    чем на `RATING_MAX_STALENESS` секунд (например, обработчик не
+    запущен), переданные произведения пересчитываются сразу, а остальная
+    очередь остаётся обработчику: транзакция записи не разбирает чужую
+    пачку.
+    """
+    title_ids = set(title_ids)
+    now = timezone.now()
+    bound = settings.RATING_MAX_STALENESS
+    if bound is not None and DirtyTitle.objects.filter(
+        dirtied_at__lt=now - timedelta(seconds=bound)
+    ).exists():
+        logger.warning(
+            'Rating queue is more than %s seconds behind, '
+            'recomputing titles %s inline', bound, sorted(title_ids)
+        )
+        DirtyTitle.objects.filter(title_id__in=title_ids).delete()
+        recompute_title_aggregates(title_ids)
+        titles_recomputed.send(sender=DirtyTitle, title_ids=list(title_ids))
+        return
+    DirtyTitle.objects.bulk_create(
+        [DirtyTitle(title_id=pk, dirtied_at=now) for pk in title_ids],
+        ignore_conflicts=True
+    )
+
+
+def drain_dirty_titles(batch_size=None):
+    """
+    Пересчитывает агрегаты пачки давнее всего отмеченных произведений
+    и возвращает их id. Отметки удаляются до пересчёта в той же
+    транзакции: отзыв, записанный после пересчёта, отметит произведение
+    заново.
+    """
+    batch_size = batch_size or settings.RATING_DRAIN_BATCH_SIZE
+    with transaction.atomic():
+        title_ids = list(
+            DirtyTitle.objects.order_by('dirtied_at').values_list(
+                'title_id', flat=True
+            )[:batch_size]
+        )
+        if not title_ids:
+            return []
+        DirtyTitle.objects.filter(title_id__in=title_ids).delete()
+        recompute_title_aggregates(title_ids)
+        titles_recomputed.send(sender=DirtyTitle, title_ids=title_ids)
+    return title_ids
+
+
+def dirty_queue_stats():
+    """
+    Метрики очереди: `depth` — число отмеченных произведений,
+    `lag` — возраст самой старой отметки в секундах.
+    """
+    stats = DirtyTitle.objects.aggregate(
+        depth=Count('pk'), oldest=Min('dirtied_at')
+    )
+    oldest = stats['oldest']
+    return {
+        'depth': stats['depth'],
+        'lag': (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -0,0 +1,156 @@
+"""
+Отложенное удаление произведений и пользователей.
+
+Запрос на удаление только ставит `deleted_at`: объект сразу пропадает из
+API (менеджеры по умолчанию его не видят), отзывы и комментарии
+удалённого пользователя скрываются сразу же. Связанные отзывы
+и комментарии удаляет команда `purge_deleted` пачками по `chunk_size`
+строк, каждая в своей транзакции. Пачки удаляются запросом DELETE без
+загрузки объектов и сигналов удаления, поэтому счётчики комментариев
+пересчитываются для затронутых отзывов в той же транзакции, а рейтинги
+произведений — через очередь `DirtyTitle` после всех пачек. До этого
+пересчёта записи удалённого пользователя остаются в рейтингах
+и счётчиках. Прерванная очистка продолжается при следующем запуске.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from users.models import User
+from .aggregates import (drain_dirty_titles, mark_titles_dirty,
+                         recompute_review_comments)
+from .models import Comment, DirtyTitle, GenreTitle, Review, Title
+
+# Отправляется после каждой пачки с аргументами `title_ids` (изменились
+# списки отзывов) и `review_ids` (изменились списки комментариев).
+content_purged = Signal()
+
+
+def mark_deleted(instance):
+    """
+    Помечает произведение или пользователя удалённым; пользователь
+    к тому же деактивируется. Без `DEFERRED_DELETION` объект удаляется
+    сразу.
+    """
+    if not settings.DEFERRED_DELETION:
+        instance.delete()
+        return
+    instance.deleted_at = timezone.now()
+    fields = ['deleted_at']
+    if isinstance(instance, User):
+        instance.is_active = False
+        fields.append('is_active')
+    instance.save(update_fields=fields)
+
+
+def delete_rows(queryset):
+    """DELETE по условию без сборщика каскадов и сигналов."""
+    return queryset._raw_delete(queryset.db)
+
+
+def purge_comments(comments, chunk_size):
+    """Удаляет комментарии пачками и обновляет счётчики их отзывов."""
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(comments.order_by('pk').values_list(
+                'pk', 'review_id', 'review__title_id'
+            )[:chunk_size])
+            if not rows:
+                return deleted
+            delete_rows(Comment.objects.filter(
+                pk__in=[pk for pk, _, _ in rows]
+            ))
+            review_ids = {review_id for _, review_id, _ in rows}
+            recompute_review_comments(review_ids)
+            content_purged.send(
+                sender=Comment,
+                title_ids={title_id for _, _, title_id in rows},
+                review_ids=review_ids,
+            )
+        deleted += len(rows)
+
+
+def purge_reviews(reviews, chunk_size):
+    """
+    Удаляет отзывы пачками и ставит их произведения в очередь пересчёта.
+    Комментарии, появившиеся у отзывов после очистки комментариев,
+    удаляются вместе с ними.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(reviews.order_by('pk').values_list(
+                'pk', 'title_id'
+            )[:chunk_size])
+            if not rows:
+                return deleted
+            review_ids = [pk for pk, _ in rows]
+            title_ids = {title_id for _, title_id in rows}
+            delete_rows(Comment.objects.filter(review_id__in=review_ids))
+            delete_rows(Review.objects.filter(pk__in=review_ids))
+            mark_titles_dirty(title_ids)
+            content_purged.send(
+                sender=Review, title_ids=title_ids, review_ids=review_ids
+            )
+        deleted += len(rows)
+
+
+def drain_all_dirty_titles(chunk_size):
+    while len(drain_dirty_titles(chunk_size)) == chunk_size:
+        pass
+
+
+def purge_title(title, chunk_size):
+    """Удаляет помеченное произведение вместе с отзывами и комментариями."""
+    purge_comments(
+        Comment.objects.filter(review__title_id=title.pk), chunk_size
+    )
+    purge_reviews(Review.objects.filter(title_id=title.pk), chunk_size)
+    with transaction.atomic():
+        delete_rows(GenreTitle.objects.filter(title_id=title.pk))
+        DirtyTitle.objects.filter(title_id=title.pk).delete()
+        title.delete()
+
+
+def purge_user(user, chunk_size):
+    """
+    Удаляет помеченного пользователя, его отзывы и комментарии,
+    комментарии к его отзывам и пересчитывает рейтинги произведений.
+    """
+    purge_comments(
+        Comment.objects.filter(Q(author_id=user.pk)
+                               | Q(review__author_id=user.pk)),
+        chunk_size
+    )
+    purge_reviews(Review.objects.filter(author_id=user.pk), chunk_size)
+    drain_all_dirty_titles(chunk_size)
+    user.delete()
+
+
+def purge_deleted(chunk_size):
+    """
+    Очищает все помеченные произведения и пользователей в порядке
+    удаления и возвращает число очищенных объектов каждого вида.
+    """
+    titles = Title.all_objects.filter(
+        deleted_at__isnull=False
+    ).order_by('deleted_at')
+    for title in titles:
+        purge_title(title, chunk_size)
+    users = User.all_objects.filter(
+        deleted_at__isnull=False
+    ).order_by('deleted_at')
+    for user in users:
+        purge_user(user, chunk_size)
+    return {'titles': len(titles), 'users': len(users)}
+
+
+def pending_deletions():
+    """Число помеченных, но ещё не очищенных объектов."""
+    return {
+        'titles': Title.all_objects.filter(deleted_at__isnull=False).count(),
+        'users': User.all_objects.filter(deleted_at__isnull=False).count(),
+    }
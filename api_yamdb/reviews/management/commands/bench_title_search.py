@@ -0,0 +1,109 @@
+import itertools
+import random
+import sqlite3
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.search import FTS_TABLE, TITLE_TABLE, build_match_query
+
+# Индекс и триггеры создаются тем же DDL, что и в миграции.
+CREATE_SQL = import_module('reviews.migrations.0006_title_fts').CREATE_SQL
+
+SYLLABLES = (
+    'ка ра ло ми на зо ве ту ри са ко ле ни ма до ры ша би ga ro li '
+    'me na zo ve tu ri sa ko le ni ma do ry sha bi'
+).split()
+
+
+def make_vocabulary(rnd, size):
+    return list({
+        ''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4)))
+        for _ in range(size)
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark FTS5 title search against icontains on a synthetic '
+        'in-memory copy of the titles table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--vocabulary', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        words = make_vocabulary(rnd, options['vocabulary'])
+        # Частоты слов убывают по Ципфу, как в естественных текстах.
+        weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, len(words) + 1)
+        ))
+        db = sqlite3.connect(':memory:')
+        db.execute(
+            f'CREATE TABLE {TITLE_TABLE} (id INTEGER PRIMARY KEY, '
+            f'name VARCHAR(256) NOT NULL, description TEXT NULL)'
+        )
+        try:
+            for sql in CREATE_SQL:
+                db.execute(sql)
+        except sqlite3.OperationalError as error:
+            raise CommandError(f'FTS5 is not available: {error}')
+
+        started = time.perf_counter()
+        db.executemany(
+            f'INSERT INTO {TITLE_TABLE} (name, description) VALUES (?, ?)',
+            (
+                (
+                    ' '.join(
+                        rnd.choices(words, cum_weights=weights, k=3)
+                    ).capitalize(),
+                    ' '.join(rnd.choices(words, cum_weights=weights, k=20)),
+                )
+                for _ in range(options['titles'])
+            )
+        )
+        db.commit()
+        self.stdout.write(
+            f'Loaded {options["titles"]} titles with FTS index in '
+            f'{time.perf_counter() - started:.1f}s'
+        )
+
+        terms = rnd.choices(words, k=options['queries'])
+        icontains_sql = (
+            f'SELECT id FROM {TITLE_TABLE} '
+            f"WHERE name LIKE ? ESCAPE '\\' OR description LIKE ? "
+            f"ESCAPE '\\' ORDER BY name LIMIT 10"
+        )
+        fts_sql = (
+            f'SELECT {TITLE_TABLE}.id FROM {TITLE_TABLE}, {FTS_TABLE} '
+            f'WHERE {FTS_TABLE}.rowid = {TITLE_TABLE}.id '
+            f'AND {FTS_TABLE} MATCH ? ORDER BY {FTS_TABLE}.rank LIMIT 10'
+        )
+        results = {
+            'icontains': self.measure(
+                db, icontains_sql,
+                ((f'%{term}%', f'%{term}%') for term in terms)
+            ),
+            'fts5': self.measure(
+                db, fts_sql, ((build_match_query(term),) for term in terms)
+            ),
+        }
+        for name, timings in results.items():
+            timings.sort()
+            self.stdout.write(
+                f'{name:>10}: median {timings[len(timings) // 2]:.2f} ms, '
+                f'max {timings[-1]:.2f} ms per first page'
+            )
+
+    def measure(self, db, sql, params_list):
+        timings = []
+        for params in params_list:
+            started = time.perf_counter()
+            db.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
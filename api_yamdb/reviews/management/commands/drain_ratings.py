@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.aggregates import dirty_queue_stats, drain_dirty_titles
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute title aggregates queued in write-behind mode '
+        '(RATING_WRITE_BEHIND), in batches, on an interval'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=settings.RATING_DRAIN_INTERVAL,
+            help='Seconds to sleep after the queue has been emptied'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.RATING_DRAIN_BATCH_SIZE,
+            help='Titles recomputed per transaction'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Empty the queue once and exit'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Only print queue depth and lag'
+        )
+
+    def write_stats(self, drained=None):
+        stats = dirty_queue_stats()
+        prefix = '' if drained is None else f'drained={drained} '
+        self.stdout.write(
+            f'{prefix}depth={stats["depth"]} lag={stats["lag"]:.1f}s'
+        )
+
+    def drain(self, batch_size):
+        drained = 0
+        while True:
+            title_ids = drain_dirty_titles(batch_size)
+            drained += len(title_ids)
+            if len(title_ids) < batch_size:
+                return drained
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        try:
+            while True:
+                started = time.monotonic()
+                drained = self.drain(options['batch_size'])
+                if drained or options['once']:
+                    self.write_stats(drained)
+                if options['once']:
+                    return
+                time.sleep(max(
+                    0.0, options['interval'] - (time.monotonic() - started)
+                ))
+        except KeyboardInterrupt:
+            self.write_stats()
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.deletion import pending_deletions, purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete titles and users marked as deleted together with their '
+        'reviews and comments, in chunked transactions, on an interval'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.DEFERRED_DELETION_INTERVAL,
+            help='Seconds to sleep between passes'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.DEFERRED_DELETION_CHUNK_SIZE,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Purge everything marked so far and exit'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Only print the number of objects waiting to be purged'
+        )
+
+    def write_stats(self, purged=None):
+        pending = pending_deletions()
+        prefix = '' if purged is None else (
+            f'purged_titles={purged["titles"]} '
+            f'purged_users={purged["users"]} '
+        )
+        self.stdout.write(
+            f'{prefix}pending_titles={pending["titles"]} '
+            f'pending_users={pending["users"]}'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        try:
+            while True:
+                started = time.monotonic()
+                purged = purge_deleted(options['chunk_size'])
+                if any(purged.values()) or options['once']:
+                    self.write_stats(purged)
+                if options['once']:
+                    return
+                time.sleep(max(
+                    0.0, options['interval'] - (time.monotonic() - started)
+                ))
+        except KeyboardInterrupt:
+            self.write_stats()
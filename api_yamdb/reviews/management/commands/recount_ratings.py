@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.aggregates import (find_inconsistent_titles,
+                                recompute_title_aggregates, titles_recomputed)
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored title rating aggregates from reviews and check them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='Titles to process (all titles by default)'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only check aggregates, do not rebuild them'
+        )
+
+    def handle(self, *args, **options):
+        title_ids = options['title_ids'] or None
+        if not options['check']:
+            recompute_title_aggregates(title_ids)
+            # Закэшированные ответы и ETag с прежним рейтингом устаревают.
+            titles_recomputed.send(sender=Title, title_ids=title_ids)
+            self.stdout.write('Title aggregates rebuilt.')
+        mismatches = 0
+        for pk, stored, actual in find_inconsistent_titles(title_ids):
+            mismatches += 1
+            self.stdout.write(
+                f'Title {pk}: stored (sum, count, rating, scores 1-10) '
+                f'{stored}, actual {actual}'
+            )
+        if mismatches:
+            raise CommandError(f'{mismatches} title(s) are inconsistent.')
+        self.stdout.write(
+            self.style.SUCCESS('Title aggregates are consistent.')
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 18:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_stats(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Review = apps.get_model('reviews', 'Review')
+    comments = Comment.objects.filter(review=OuterRef('pk')).order_by()
+    Review.objects.update(
+        comments_count=Coalesce(
+            Subquery(
+                comments.values('review').annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            0
+        ),
+        last_comment_at=Subquery(
+            comments.order_by('-id').values('pub_date')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_distribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата последнего комментария'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'comments_count', 'id'], name='review_comments_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'last_comment_at', 'id'], name='review_last_comment_at_idx'),
+        ),
+        migrations.RunPython(fill_comment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyTitle',
+            fields=[
+                ('title_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Произведение')),
+                ('dirtied_at', models.DateTimeField(db_index=True, verbose_name='Время отметки')),
+            ],
+            options={
+                'verbose_name': 'Произведение с устаревшим рейтингом',
+                'verbose_name_plural': 'Произведения с устаревшим рейтингом',
+            },
+        ),
+    ]
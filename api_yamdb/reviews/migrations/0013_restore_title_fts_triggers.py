@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# SQLite пересоздаёт reviews_title при добавлении столбцов (0007, 0012),
+# и триггеры FTS5 из 0006 удаляются вместе со старой таблицей. DDL
+# записан прямо в миграции, как и в 0006.
+TRIGGERS_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_ai AFTER INSERT "
+    "ON reviews_title BEGIN "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_ad AFTER DELETE "
+    "ON reviews_title BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    "description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_au AFTER UPDATE OF "
+    "name, description ON reviews_title BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    "description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    # Изменения, сделанные без триггеров, попадают в индекс.
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+
+
+def restore_title_fts_triggers(apps, schema_editor):
+    # Таблица FTS5 есть, только если 0006 нашла модуль FTS5.
+    if 'reviews_title_fts' not in (
+        schema_editor.connection.introspection.table_names()
+    ):
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_deferred_deletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            restore_title_fts_triggers, migrations.RunPython.noop
+        ),
+    ]
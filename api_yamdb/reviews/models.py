@@ -1,9 +1,28 @@
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import Signal
 
 from users.models import User
 from .validators import validate_rating, validate_year
 from .utils import slugify
 
+SCORES = range(1, 11)
+
+# bulk_create не отправляет post_save, поэтому создание произведений
+# списком сообщается отдельно, с аргументами `titles` и `links`
+# (созданные связи GenreTitle).
+titles_bulk_created = Signal()
+
+
+class LiveManager(models.Manager):
+    """Менеджер по умолчанию: без объектов, помеченных удалёнными."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+def score_count_field(score):
+    return f'score_{score}_count'
+
 
 class CategoryGenreAbstract(models.Model):
     """
@@ -76,15 +95,107 @@ class Title(models.Model):
         related_name='titles',
         null=True
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Целая часть средней оценки, обновляется с отзывами.'
+    )
+    # Гистограмма оценок: по счётчику отзывов на каждую оценку от 1 до 10.
+    score_1_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 1',
+        default=0,
+        editable=False
+    )
+    score_2_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 2',
+        default=0,
+        editable=False
+    )
+    score_3_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 3',
+        default=0,
+        editable=False
+    )
+    score_4_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 4',
+        default=0,
+        editable=False
+    )
+    score_5_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 5',
+        default=0,
+        editable=False
+    )
+    score_6_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 6',
+        default=0,
+        editable=False
+    )
+    score_7_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 7',
+        default=0,
+        editable=False
+    )
+    score_8_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 8',
+        default=0,
+        editable=False
+    )
+    score_9_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 9',
+        default=0,
+        editable=False
+    )
+    score_10_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок 10',
+        default=0,
+        editable=False
+    )
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        editable=False,
+        help_text='Удалённое произведение скрыто до очистки purge_deleted.'
+    )
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            # Частичный индекс: находит удалённые для purge_deleted и не
+            # мешает планировщику в запросах с deleted_at IS NULL.
+            models.Index(
+                fields=['deleted_at'], name='title_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_distribution(self):
+        return {
+            score: getattr(self, score_count_field(score)) for score in SCORES
+        }
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -139,6 +250,16 @@ class Review(ReviewCommentAbstract):
         validators=[validate_rating],
         help_text='От 1 до 10'
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        verbose_name='Дата последнего комментария',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -149,8 +270,36 @@ class Review(ReviewCommentAbstract):
                 name='one_author_review'
             )
         ]
+        indexes = [
+            models.Index(fields=['title', '-id'], name='review_title_id_idx'),
+            models.Index(
+                fields=['title', 'comments_count', 'id'],
+                name='review_comments_count_idx'
+            ),
+            models.Index(
+                fields=['title', 'last_comment_at', 'id'],
+                name='review_last_comment_at_idx'
+            ),
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_pub_date_idx'
+            ),
+            models.Index(
+                fields=['title', 'score', 'id'], name='review_score_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='review_author_pub_date_idx'
+            ),
+        ]
         ordering = ['-id']
 
+    def save(self, *args, **kwargs):
+        # Агрегаты произведения обновляются в post_save, поэтому запись
+        # отзыва и их пересчёт должны попасть в одну транзакцию.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(ReviewCommentAbstract):
     review = models.ForeignKey(
@@ -163,4 +312,45 @@ class Comment(ReviewCommentAbstract):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-id'], name='comment_review_id_idx'
+            ),
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='comment_author_pub_date_idx'
+            ),
+        ]
         ordering = ['-id']
+
+    def save(self, *args, **kwargs):
+        # Счётчики отзыва обновляются в post_save, поэтому запись
+        # комментария и их изменение должны попасть в одну транзакцию.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class DirtyTitle(models.Model):
+    """
+    Очередь произведений, агрегаты которых нужно пересчитать в режиме
+    отложенной записи (`RATING_WRITE_BEHIND`). Повторные отметки одного
+    произведения схлопываются, `dirtied_at` хранит время первой из них.
+    Внешнего ключа нет: отметка удалённого произведения просто пропадёт
+    при разборе очереди.
+    """
+    title_id = models.BigIntegerField(
+        verbose_name='Произведение',
+        primary_key=True
+    )
+    dirtied_at = models.DateTimeField(
+        verbose_name='Время отметки',
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Произведение с устаревшим рейтингом'
+        verbose_name_plural = 'Произведения с устаревшим рейтингом'
@@ -0,0 +1,70 @@
+"""
+Полнотекстовый поиск по названию и описанию произведений.
+
+На SQLite со сборкой FTS5 используется внешняя (external content)
+таблица FTS5, которую триггеры синхронизируют с `reviews_title` при
+вставке, изменении и удалении строк. Без FTS5 поиск сводится к
+`icontains` по тем же полям для каждого слова запроса.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+TITLE_TABLE = 'reviews_title'
+FTS_TABLE = 'reviews_title_fts'
+
+_fts_enabled = {}
+
+
+def fts_enabled(using='default'):
+    """
+    Есть ли в базе индекс FTS5 (создаётся миграцией, если FTS5 доступен).
+    Результат запоминается на время жизни процесса.
+    """
+    if using not in _fts_enabled:
+        connection = connections[using]
+        _fts_enabled[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_enabled[using]
+
+
+def build_match_query(text):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5: каждое
+    слово берётся в кавычки и ищется по префиксу, слова объединяются по И.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_titles(queryset, text):
+    """
+    Фильтрует произведения по тексту и сортирует их по релевантности.
+    Сортировка задаётся через `extra(order_by=...)`, поэтому курсорная
+    пагинация для результатов поиска не строится (см.
+    `PageNumberOrCursorPagination`).
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not fts_enabled(queryset.db):
+        # Как и в FTS5, каждое слово ищется отдельно, слова — по И.
+        condition = Q()
+        for word in re.findall(r'\w+', text):
+            condition &= (
+                Q(name__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset.filter(condition)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = {TITLE_TABLE}.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': f'{FTS_TABLE}.rank'},
+        # id различает равные по релевантности: порядок страниц стабилен.
+        order_by=['search_rank', '-id'],
+    )
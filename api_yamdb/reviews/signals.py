@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .aggregates import (apply_comment_added, apply_comment_removed,
+                         apply_review_change, mark_titles_dirty,
+                         recompute_title_aggregates)
+from .models import Comment, Review
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """
+    Запоминает оценку и произведение в том виде, в каком они лежат в базе,
+    чтобы при сохранении применить к агрегатам только разницу.
+    Отложенные через only()/defer() поля не подгружаются.
+    """
+    instance._stored_score = instance.__dict__.get('score')
+    instance._stored_title_id = instance.__dict__.get('title_id')
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if settings.RATING_WRITE_BEHIND:
+        # Правка только текста не меняет агрегаты.
+        unchanged = (
+            not created
+            and instance._stored_score == instance.score
+            and instance._stored_title_id == instance.title_id
+        )
+        if not unchanged:
+            mark_titles_dirty(
+                {instance.title_id, instance._stored_title_id} - {None}
+            )
+    elif created:
+        apply_review_change(instance.title_id, new_score=instance.score)
+    elif (instance._stored_score is None
+            or instance._stored_title_id is None):
+        recompute_title_aggregates([instance.title_id])
+    elif instance._stored_title_id != instance.title_id:
+        apply_review_change(
+            instance._stored_title_id, old_score=instance._stored_score
+        )
+        apply_review_change(instance.title_id, new_score=instance.score)
+    else:
+        apply_review_change(
+            instance.title_id, instance._stored_score, instance.score
+        )
+    instance._stored_score = instance.score
+    instance._stored_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    if settings.RATING_WRITE_BEHIND:
+        mark_titles_dirty([instance.title_id])
+    elif instance._stored_score is None:
+        recompute_title_aggregates([instance.title_id])
+    else:
+        apply_review_change(
+            instance._stored_title_id, old_score=instance._stored_score
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_comment_added(instance.review_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    apply_comment_removed(instance.review_id, instance.pub_date)
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import outbox_stats, send_due_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued emails in batches over one backend connection, '
+        'retrying failures with backoff'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_INTERVAL,
+            help='Seconds to sleep when no email is due'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+            help='Emails sent over one connection'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Send the emails that are due now and exit'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Only print pending and dead email counts'
+        )
+
+    def write_stats(self, totals=None):
+        stats = outbox_stats()
+        prefix = ''
+        if totals is not None:
+            prefix = ''.join(
+                f'{key}={value} ' for key, value in totals.items()
+            )
+        self.stdout.write(
+            f'{prefix}pending={stats["pending"]} dead={stats["dead"]} '
+            f'lag={stats["lag"]:.1f}s'
+        )
+
+    def send(self, batch_size):
+        totals = {'sent': 0, 'failed': 0, 'dead': 0}
+        while True:
+            result = send_due_emails(batch_size)
+            for key, value in result.items():
+                totals[key] += value
+            if sum(result.values()) < batch_size:
+                return totals
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        try:
+            while True:
+                totals = self.send(options['batch_size'])
+                if any(totals.values()) or options['once']:
+                    self.write_stats(totals)
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.write_stats()
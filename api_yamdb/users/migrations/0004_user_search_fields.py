@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+def fill_search_fields(apps, schema_editor):
+    # casefold() выполняется в Python: lower() в SQLite не приводит
+    # кириллицу.
+    User = apps.get_model('users', 'User')
+    users = User.objects.only('username', 'email').order_by('pk')
+    batch = []
+    for user in users.iterator(chunk_size=2000):
+        user.username_search = user.username.casefold()
+        user.email_search = (user.email or '').casefold()
+        batch.append(user)
+        if len(batch) == 2000:
+            User.objects.bulk_update(
+                batch, ['username_search', 'email_search']
+            )
+            batch = []
+    User.objects.bulk_update(batch, ['username_search', 'email_search'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254, verbose_name='email для поиска'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150, verbose_name='Имя пользователя для поиска'),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_deferred_deletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='blocked',
+            field=models.BooleanField(default=False, help_text='Деактивирован администратором: повторная регистрация и код подтверждения не возвращают доступ.', verbose_name='Заблокирован'),
+        ),
+    ]
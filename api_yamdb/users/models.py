@@ -1,5 +1,17 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.dispatch import Signal
+
+# queryset.update() не отправляет post_save, поэтому массовое изменение
+# пользователей сообщается отдельно, с аргументом `user_ids`.
+users_bulk_updated = Signal()
+
+
+class LiveUserManager(UserManager):
+    """Менеджер по умолчанию: без пользователей, помеченных удалёнными."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class User(AbstractUser):
@@ -46,11 +58,71 @@ class User(AbstractUser):
         null=False
     )
 
+    # Приведённые casefold() копии для поиска по префиксу диапазоном
+    # индекса: lower() в SQLite не приводит кириллицу, а LIKE не
+    # использует обычный индекс.
+    username_search = models.CharField(
+        verbose_name='Имя пользователя для поиска',
+        max_length=150,
+        default='',
+        editable=False,
+        db_index=True
+    )
+    email_search = models.CharField(
+        verbose_name='email для поиска',
+        max_length=254,
+        default='',
+        editable=False,
+        db_index=True
+    )
+
+    blocked = models.BooleanField(
+        verbose_name='Заблокирован',
+        default=False,
+        help_text='Деактивирован администратором: повторная регистрация '
+                  'и код подтверждения не возвращают доступ.'
+    )
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        editable=False,
+        help_text='Удалённый пользователь скрыт до очистки purge_deleted.'
+    )
+
+    objects = LiveUserManager()
+    all_objects = UserManager()
+
+    SEARCH_FIELDS = {
+        'username': 'username_search',
+        'email': 'email_search',
+    }
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            # Частичный индекс, как title_deleted_idx у Title.
+            models.Index(
+                fields=['deleted_at'], name='user_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False)
+            ),
+        ]
         ordering = ['-id']
 
+    def save(self, *args, **kwargs):
+        for field, search_field in self.SEARCH_FIELDS.items():
+            setattr(
+                self, search_field, (getattr(self, field) or '').casefold()
+            )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                search_field
+                for field, search_field in self.SEARCH_FIELDS.items()
+                if field in update_fields
+            }
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == self.ADMIN or self.is_superuser or self.is_staff
@@ -58,3 +130,74 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в исходящей очереди. Записывается в одной транзакции с
+    данными, ради которых отправляется, а отправляется отдельно
+    (см. users.outbox), поэтому задержки и сбои почты не влияют на запрос.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead'),
+    ]
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255
+    )
+    body = models.TextField(
+        verbose_name='Текст'
+    )
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=254
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель'
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        choices=STATUS_CHOICES,
+        max_length=15,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Число попыток',
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Время следующей попытки'
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outgoing_email_due_idx'
+            ),
+        ]
+        ordering = ['-id']
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,148 @@
+"""
+Исходящая очередь писем.
+
+`queue_email` только записывает письмо в текущей транзакции. Отправляет
+очередь `send_due_emails` (команда `send_outbox`) пачками через одно
+соединение с почтовым backend. Неудачная попытка откладывается
+с экспоненциальной задержкой, после `OUTBOX_MAX_ATTEMPTS` попыток письмо
+переводится в состояние `dead` и больше не отправляется.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, recipient, from_email=None):
+    """
+    Ставит письмо в очередь. При `OUTBOX_SEND_ON_COMMIT` письмо сразу
+    после фиксации транзакции отправляется одной попыткой; ошибка
+    не прерывает запрос, письмо остаётся в очереди.
+    """
+    message = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        next_attempt_at=timezone.now(),
+    )
+    if settings.OUTBOX_SEND_ON_COMMIT:
+        transaction.on_commit(lambda: send_due_emails(ids=[message.pk]))
+    return message
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.OUTBOX_RETRY_MAX_DELAY
+    ))
+
+
+def claim_due_emails(batch_size, ids=None):
+    """
+    Забирает пачку писем, время отправки которых наступило, сдвигая
+    им время следующей попытки на `OUTBOX_LEASE` секунд: параллельный
+    отправитель их не увидит, а письма упавшего отправителя вернутся
+    в очередь по истечении аренды.
+    """
+    now = timezone.now()
+    due = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+    )
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    pks = list(
+        due.order_by('next_attempt_at').values_list('pk', flat=True)[
+            :batch_size
+        ]
+    )
+    if not pks:
+        return []
+    lease = now + timedelta(seconds=settings.OUTBOX_LEASE)
+    due.filter(pk__in=pks).update(next_attempt_at=lease)
+    return list(OutgoingEmail.objects.filter(
+        pk__in=pks, next_attempt_at=lease
+    ).order_by('pk'))
+
+
+def record_failure(message, error):
+    message.attempts += 1
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutgoingEmail.DEAD
+        logger.error('Email %s is dead: %s', message.pk, message.last_error)
+    else:
+        message.next_attempt_at = (
+            timezone.now() + retry_delay(message.attempts)
+        )
+    message.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt_at'
+    ))
+
+
+def send_due_emails(batch_size=None, ids=None):
+    """
+    Отправляет одну пачку писем и возвращает словарь с числом
+    отправленных (`sent`), отложенных (`failed`) и отброшенных (`dead`).
+    """
+    messages = claim_due_emails(
+        batch_size or settings.OUTBOX_BATCH_SIZE, ids
+    )
+    result = {'sent': 0, 'failed': 0, 'dead': 0}
+
+    def fail(message, error):
+        record_failure(message, error)
+        result['dead' if message.status == OutgoingEmail.DEAD
+               else 'failed'] += 1
+
+    if not messages:
+        return result
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for message in messages:
+            fail(message, error)
+        return result
+    sent = []
+    try:
+        for message in messages:
+            try:
+                EmailMessage(
+                    message.subject, message.body, message.from_email,
+                    [message.recipient], connection=connection
+                ).send()
+            except Exception as error:
+                fail(message, error)
+            else:
+                sent.append(message.pk)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=timezone.now()
+    )
+    result['sent'] = len(sent)
+    return result
+
+
+def outbox_stats():
+    """Число писем в очереди и возраст самого старого из них в секундах."""
+    oldest = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).order_by('created_at').values_list('created_at', flat=True).first()
+    return {
+        'pending': OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING
+        ).count(),
+        'dead': OutgoingEmail.objects.filter(
+            status=OutgoingEmail.DEAD
+        ).count(),
+        'lag': (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,23 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def versions_cache_dir(tmp_path_factory):
+    from django.conf import settings
+
+    # Версии ресурсов лежат в файлах: тесты не трогают каталог проекта.
+    # Настройка меняется до создания тестовой базы, которая открывает
+    # все кэши.
+    settings.CACHES['versions']['LOCATION'] = str(
+        tmp_path_factory.mktemp('versions')
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
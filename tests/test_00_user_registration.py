@@ -102,7 +102,9 @@ class Test00UserRegistration:
             'содержанию - новый пользователь не должен быть создан.'
         )
 
-    def test_00_valid_data_user_signup(self, client, django_user_model):
+    def test_00_valid_data_user_signup(self, client, django_user_model,
+                                       settings):
+        settings.OUTBOX_SEND_ON_COMMIT = True
         outbox_before_count = len(mail.outbox)
         valid_data = {
             'email': 'valid@yamdb.fake',
@@ -150,7 +152,9 @@ class Test00UserRegistration:
 
     def test_00_valid_data_admin_create_user(self,
                                              admin_client,
-                                             django_user_model):
+                                             django_user_model,
+                                             settings):
+        settings.OUTBOX_SEND_ON_COMMIT = True
         outbox_before_count = len(mail.outbox)
         valid_data = {
             'email': 'valid@yamdb.fake',
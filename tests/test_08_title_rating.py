@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, admin_client, user_client,
+                                              moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        create_single_review(admin_client, title_id, 'review 1', 3)
+        review = create_single_review(
+            user_client, title_id, 'review 2', 8
+        ).json()
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{review["id"]}/', data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        response = moderator_client.delete(f'{url}{review["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 3, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None
+
+        call_command('recount_ratings', '--check')
+
+    def test_02_recount_ratings_repairs_aggregates(self, admin_client,
+                                                   user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'review', 7)
+        Title.objects.filter(pk=title_id).update(
+            score_sum=0, reviews_count=0, rating=None
+        )
+
+        call_command('recount_ratings')
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.reviews_count, title.rating) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что команда `recount_ratings` пересчитывает '
+            'агрегаты оценок произведений.'
+        )
+
+    def test_03_score_distribution(self, client, admin_client, user_client,
+                                   moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/score-distribution/'
+
+        create_single_review(admin_client, title_id, 'review 1', 3)
+        create_single_review(moderator_client, title_id, 'review 2', 3)
+        review = create_single_review(
+            user_client, title_id, 'review 3', 9
+        ).json()
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/',
+            data={'score': 10}
+        )
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected.update({'3': 2, '10': 1})
+        assert response.json() == {
+            'id': title_id, 'count': 3, 'scores': expected
+        }, (
+            'Проверьте, что гистограмма оценок обновляется при создании и '
+            'изменении отзывов.'
+        )
+
+        response = client.get('/api/v1/titles/0/score-distribution/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        call_command('recount_ratings', '--check')
@@ -0,0 +1,41 @@
+import pytest
+
+from tests.utils import (check_query_count, create_comments,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    def create_many_titles(self, admin_client, count, categories, genres):
+        for idx in range(count):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Произведение {idx}',
+                'year': 2000,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[0]['slug'],
+            })
+
+    def test_01_title_list_and_detail(self, client, admin_client,
+                                      user_client):
+        titles, categories, genres = create_titles(admin_client)
+        self.create_many_titles(admin_client, 12, categories, genres)
+        create_single_review(user_client, titles[0]['id'], 'review', 5)
+
+        check_query_count(client, '/api/v1/titles/', 3)
+        check_query_count(client, '/api/v1/titles/?page=2', 3)
+        check_query_count(client, f'/api/v1/titles/{titles[0]["id"]}/', 2)
+
+    def test_02_review_and_comment_lists(self, client, admin_client, admin,
+                                         user_client, user, moderator_client,
+                                         moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        check_query_count(client, url, 3)
+        check_query_count(client, f'{url}{reviews[0]["id"]}/comments/', 3)
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import check_query_count, create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def collect_pages(self, client, url):
+        names = []
+        pages = 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме пагинации ответ не '
+                'содержит ключ `count`.'
+            )
+            names.extend(data['results'])
+            url = data['next']
+            pages += 1
+        return names, pages
+
+    def test_01_titles_cursor(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        for idx in range(12):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Произведение {idx:02}',
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            })
+
+        results, pages = self.collect_pages(client, '/api/v1/titles/?cursor=')
+        names = [title['name'] for title in results]
+        assert len(names) == 14 and pages == 2, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'возвращает все произведения.'
+        )
+        assert names == sorted(names), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` сохраняет '
+            'сортировку по названию.'
+        )
+        check_query_count(client, '/api/v1/titles/?cursor=', 2)
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 14, (
+            'Проверьте, что без параметра `cursor` пагинация по номерам '
+            'страниц продолжает работать.'
+        )
+
+    def test_02_reviews_cursor(self, client, admin_client, admin, user_client,
+                               user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor='
+
+        results, _ = self.collect_pages(client, url)
+        assert [review['id'] for review in results] == sorted(
+            (review['id'] for review in reviews), reverse=True
+        ), (
+            'Проверьте, что курсорная пагинация отзывов сохраняет '
+            'сортировку по убыванию `id`.'
+        )
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    def get(self, client, url, expected_cache):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Cache'] == expected_cache, (
+            f'Проверьте, что ответ на анонимный GET-запрос к `{url}` '
+            f'помечен заголовком `X-Cache: {expected_cache}`.'
+        )
+        return response.json()
+
+    def test_01_titles_cache_invalidated_by_writes(self, client, admin_client,
+                                                   user_client):
+        from api.cache import get_stats
+
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        detail_url = f'{url}{titles[0]["id"]}/'
+
+        self.get(client, f'{url}?page=1&name=', 'MISS')
+        self.get(client, f'{url}?name=&page=1', 'HIT')
+        self.get(client, detail_url, 'MISS')
+        assert get_stats() == {'hits': 1, 'misses': 2}
+
+        create_single_review(user_client, titles[0]['id'], 'review', 6)
+        data = self.get(client, detail_url, 'MISS')
+        assert data['rating'] == 6, (
+            'Проверьте, что изменение отзыва инвалидирует кэш '
+            'произведений.'
+        )
+
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        )
+        data = self.get(client, '/api/v1/categories/', 'MISS')
+        assert data['count'] == 3
+        self.get(client, '/api/v1/categories/', 'HIT')
+
+        response = admin_client.patch(
+            detail_url, data={'genre': ['drama']}
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = self.get(client, detail_url, 'MISS')
+        assert [genre['slug'] for genre in data['genre']] == ['drama'], (
+            'Проверьте, что изменение жанров произведения инвалидирует кэш '
+            'произведений.'
+        )
+
+    def test_02_authenticated_requests_bypass_cache(self, admin_client):
+        response = admin_client.get('/api/v1/genres/')
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Cache' not in response
+
+    def test_03_recount_invalidates_titles(self, client, admin_client,
+                                           user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        create_single_review(user_client, titles[0]['id'], 'review', 10)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_sum=1, rating=1
+        )
+        assert self.get(client, detail_url, 'MISS')['rating'] == 1
+        etag = client.get(detail_url)['ETag']
+
+        call_command('recount_ratings', stdout=StringIO())
+        data = self.get(client, detail_url, 'MISS')
+        assert data['rating'] == 10, (
+            'Проверьте, что `recount_ratings` сбрасывает закэшированные '
+            'ответы с рейтингом.'
+        )
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    def search(self, client, text):
+        response = client.get('/api/v1/titles/', {'q': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_fts_search(self, client, admin_client):
+        from reviews.search import fts_enabled
+
+        titles, _, _ = create_titles(admin_client)
+        assert fts_enabled(), 'FTS5 недоступен в тестовой базе.'
+
+        assert self.search(client, 'ОРЕШ') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `q` ищет произведения по префиксу '
+            'слова в названии без учёта регистра.'
+        )
+        assert self.search(client, 'back') == ['Терминатор'], (
+            'Проверьте, что параметр `q` ищет по описанию произведения.'
+        )
+        assert self.search(client, '"back*') == ['Терминатор']
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'name': 'Назад в будущее'}
+        )
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'будущее') == ['Назад в будущее'], (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'произведения.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.search(client, 'орешек') == [], (
+            'Проверьте, что индекс поиска обновляется при удалении '
+            'произведения.'
+        )
+
+    def test_02_search_fallback(self, client, admin_client, monkeypatch):
+        from reviews import search
+
+        create_titles(admin_client)
+        monkeypatch.setitem(search._fts_enabled, 'default', False)
+
+        assert self.search(client, 'орешек') == ['Крепкий орешек'], (
+            'Проверьте, что без FTS5 поиск выполняется через `icontains`.'
+        )
+
+    def test_03_fts_triggers_exist(self):
+        from django.db import connection
+
+        from reviews.search import FTS_TABLE
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'reviews_title'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        assert {f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad',
+                f'{FTS_TABLE}_au'} <= triggers, (
+            'Проверьте, что после всех миграций на таблице произведений '
+            'есть триггеры синхронизации FTS5: пересоздание таблицы '
+            'в миграции их удаляет.'
+        )
+
+    def test_04_equal_rank_order_is_stable(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        ids = []
+        for _ in range(3):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': 'Дюна',
+                'year': 1984,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            })
+            ids.append(response.json()['id'])
+        response = client.get('/api/v1/titles/', {'q': 'дюна'})
+        assert [title['id'] for title in response.json()['results']] == (
+            sorted(ids, reverse=True)
+        ), (
+            'Проверьте, что произведения с равной релевантностью '
+            'упорядочены по id.'
+        )
+
+    def test_05_search_fallback_matches_each_word(self, client, admin_client,
+                                                  monkeypatch):
+        from reviews import search
+
+        create_titles(admin_client)
+        monkeypatch.setitem(search._fts_enabled, 'default', False)
+
+        assert self.search(client, 'орешек Крепкий') == ['Крепкий орешек'], (
+            'Проверьте, что без FTS5 каждое слово запроса ищется отдельно, '
+            'как и в полнотекстовом поиске.'
+        )
+        assert self.search(client, 'орешек back') == [], (
+            'Проверьте, что без FTS5 слова запроса объединяются по И.'
+        )
+
+    def test_06_cursor_keeps_rank_order(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        ids = []
+        for name, description in (
+            ('Дюна', ''),
+            ('Арракис', 'Долгая история о пустыне, где за каждым барханом '
+                      'встречается дюна, караван и ветер.'),
+        ):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': name,
+                'description': description,
+                'year': 1984,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            })
+            ids.append(response.json()['id'])
+        response = client.get('/api/v1/titles/', {'q': 'дюна', 'cursor': ''})
+        assert response.status_code == HTTPStatus.OK
+        assert [title['id'] for title in response.json()['results']] == ids, (
+            'Проверьте, что с параметром `cursor` результаты поиска '
+            'по-прежнему упорядочены по релевантности.'
+        )
+        assert 'count' in response.json(), (
+            'Проверьте, что результаты поиска разбиты на страницы '
+            'с номерами и с параметром `cursor`.'
+        )
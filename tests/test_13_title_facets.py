@@ -0,0 +1,167 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleFacets:
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `/api/v1/titles/?{query}` '
+            'возвращает ответ со статусом 200.'
+        )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def check_filters(self, client):
+        assert self.names(client, 'genre=horror,comedy') == ['Терминатор'], (
+            'Проверьте, что фильтр по нескольким жанрам не возвращает '
+            'дубли произведений.'
+        )
+        assert self.names(client, 'genre=drama,comedy') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        assert self.names(client, 'genre=!drama') == ['Терминатор'], (
+            'Проверьте, что фасет с `!` исключает значение.'
+        )
+        assert self.names(client, 'category=books&year=1988') == [
+            'Крепкий орешек'
+        ]
+        assert self.names(client, 'category=films&year=!1984') == []
+        assert self.names(client, 'genre=unknown') == []
+        response = client.get('/api/v1/titles/?year=never')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_01_facets_with_index(self, client, admin_client, monkeypatch):
+        from api.facets import TitleFacetIndex, title_facets
+
+        titles, _, _ = create_titles(admin_client)
+        self.check_filters(client)
+
+        rebuilds = []
+        rebuild = TitleFacetIndex.rebuild
+        monkeypatch.setattr(
+            TitleFacetIndex, 'rebuild',
+            lambda index: rebuilds.append(1) or rebuild(index)
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'genre': ['comedy'], 'year': 1990}
+        )
+        assert self.names(client, 'genre=comedy&year=1990') == [
+            'Крепкий орешек'
+        ]
+        assert self.names(client, 'genre=drama') == []
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.names(client, 'genre=horror') == []
+        assert not rebuilds, (
+            'Проверьте, что изменения произведений применяются к индексу '
+            'фасетов без его перестроения.'
+        )
+        assert title_facets.version is not None
+
+    def test_02_facets_without_index(self, client, admin_client, settings):
+        settings.TITLE_FACET_INDEX = False
+        create_titles(admin_client)
+        self.check_filters(client)
+
+    def test_03_large_result_paged_by_index(self, client, admin_client,
+                                            settings, monkeypatch):
+        from api.pagination import PageNumberOrCursorPagination
+
+        settings.TITLE_FACET_INDEX_MAX_IDS = 1
+        monkeypatch.setattr(PageNumberOrCursorPagination, 'page_size', 2)
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Армагеддон', 'year': 1998, 'genre': ['drama'],
+            'category': 'films',
+        })
+        url = '/api/v1/titles/?genre=drama,comedy'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['count'] == 3
+        assert [title['name'] for title in data['results']] == [
+            'Армагеддон', 'Крепкий орешек'
+        ], (
+            'Проверьте, что большой результат фасетов отдаётся страницами '
+            'в порядке названий.'
+        )
+        joins = [query['sql'] for query in context.captured_queries
+                 if 'FROM "reviews_title"' in query['sql']
+                 and ('JOIN' in query['sql']
+                      or '"reviews_genretitle"' in query['sql'])]
+        assert not joins, (
+            'Проверьте, что страница большого результата выбирается по '
+            'индексу, а не соединением с жанрами.'
+        )
+        response = client.get(f'{url}&page=2')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Терминатор'
+        ]
+        names, next_url = [], f'{url}&cursor='
+        while next_url:
+            data = client.get(next_url).json()
+            names.extend(title['name'] for title in data['results'])
+            next_url = data['next']
+        assert names == ['Армагеддон', 'Крепкий орешек', 'Терминатор'], (
+            'Проверьте, что в курсорном режиме фасеты по-прежнему '
+            'фильтруют произведения.'
+        )
+
+    def test_04_review_writes_keep_index(self, client, admin_client,
+                                         user_client, monkeypatch):
+        from api.cache import bump_version
+        from api.facets import TitleFacetIndex, title_facets, warm_up
+
+        titles, _, _ = create_titles(admin_client)
+        warm_up()
+        assert title_facets.version is not None, (
+            'Проверьте, что индекс фасетов строится при запуске.'
+        )
+        rebuilds = []
+        rebuild = TitleFacetIndex.rebuild
+        monkeypatch.setattr(
+            TitleFacetIndex, 'rebuild',
+            lambda index: rebuilds.append(1) or rebuild(index)
+        )
+        create_single_review(user_client, titles[0]['id'], 'review', 5)
+        # Отзыв и пересчёт рейтинга в другом процессе.
+        bump_version('titles', f'reviews:{titles[0]["id"]}')
+        self.check_filters(client)
+        assert not rebuilds, (
+            'Проверьте, что запись отзывов не перестраивает индекс фасетов.'
+        )
+
+        bump_version('titles', 'facets')
+        self.check_filters(client)
+        assert rebuilds, (
+            'Проверьте, что изменение произведений в другом процессе '
+            'перестраивает индекс фасетов.'
+        )
+
+
+def test_ordered_ids_sparse_and_dense_masks():
+    from api.facets import TitleFacetIndex
+
+    index = TitleFacetIndex()
+    index.rows = {pk: (f'name {pk % 7}', None, 2000) for pk in range(1, 301)}
+    index.by_name = tuple(sorted(
+        (name, pk) for pk, (name, _, _) in index.rows.items()
+    ))
+    for ids in (range(1, 301), range(5, 301, 97), range(2, 301, 3)):
+        mask = sum(1 << pk for pk in ids)
+        expected = [pk for _, pk in index.by_name if pk in ids]
+        for start, stop in ((0, 10), (20, 30), (0, None), (290, 300)):
+            assert index.ordered_ids(
+                mask, len(ids), start, stop
+            ) == expected[start:stop], (
+                'Проверьте, что индекс отдаёт страницу результата фасетов '
+                'в порядке названий.'
+            )
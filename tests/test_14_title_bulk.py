@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleBulkCreate:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create(self, client, admin_client, user_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx % 20,
+                'genre': [genres[idx % 3]['slug'], genres[0]['slug']],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(2000)
+        ]
+
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Если POST-запрос администратора к `{self.url}` содержит '
+            'корректные данные - должен вернуться ответ со статусом 201.'
+        )
+        ids = response.json()['ids']
+        assert len(ids) == len(data)
+        # Произведения и связи с жанрами пишутся пачками по лимиту
+        # параметров SQLite, остальные запросы не зависят от размера списка.
+        inserts = [query for query in context.captured_queries
+                   if query['sql'].startswith('INSERT')]
+        assert len(inserts) <= len(data) // 20, (
+            'Проверьте, что произведения из списка создаются через '
+            'bulk_create, без запросов на каждое произведение.'
+        )
+        assert len(context.captured_queries) - len(inserts) <= 10
+
+        response = client.get(f'/api/v1/titles/{ids[4]}/')
+        title = response.json()
+        assert title['name'] == data[4]['name']
+        assert sorted(genre['slug'] for genre in title['genre']) == sorted(
+            data[4]['genre']
+        ), 'Проверьте, что жанры созданных списком произведений сохранены.'
+        duplicated = client.get(f'/api/v1/titles/{ids[3]}/').json()
+        assert [genre['slug'] for genre in duplicated['genre']] == [
+            genres[0]['slug']
+        ], 'Проверьте, что повторный жанр в списке не создаёт дубль связи.'
+        assert title['category']['slug'] == data[4]['category']
+
+        response = client.get(
+            f'/api/v1/titles/?genre={genres[1]["slug"]}&year=2001'
+        )
+        assert response.json()['count'] == len([
+            item for item in data
+            if genres[1]['slug'] in item['genre'] and item['year'] == 2001
+        ])
+
+    def test_02_bulk_create_errors(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        valid = {
+            'name': 'Произведение',
+            'year': 2000,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        }
+        response = admin_client.post(
+            self.url, data=[valid, {**valid, 'year': 'никогда'}],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {} and 'year' in errors[1], (
+            'Проверьте, что ошибки валидации возвращаются для каждого '
+            'произведения из списка.'
+        )
+
+        response = admin_client.post(
+            self.url,
+            data=[{**valid, 'genre': ['unknown']}, valid],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert 'genre' in errors[0] and errors[1] == {}
+
+        response = admin_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что при ошибках в списке ни одно произведение не '
+            'создаётся.'
+        )
@@ -0,0 +1,57 @@
+import pytest
+
+from tests.utils import check_query_count, create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SparseFields:
+
+    def test_01_titles_fields(self, client, admin_client, admin, user,
+                              user_client):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+
+        response = check_query_count(
+            client, '/api/v1/titles/?fields=id,name,rating', 2
+        )
+        for title in response.json()['results']:
+            assert set(title) == {'id', 'name', 'rating'}, (
+                'Проверьте, что параметр `fields` оставляет в ответе только '
+                'перечисленные поля.'
+            )
+
+        response = check_query_count(
+            client, f'/api/v1/titles/{titles[0]["id"]}/?omit=genre', 1
+        )
+        assert set(response.json()) == {
+            'id', 'name', 'year', 'rating', 'description', 'category'
+        }, 'Проверьте, что параметр `omit` убирает поля из ответа.'
+
+        response = check_query_count(
+            client, '/api/v1/titles/?cursor=&fields=rating', 1
+        )
+        assert response.json()['results'] == [{'rating': None}, {'rating': 5}]
+
+    def test_02_reviews_and_users_fields(self, client, admin_client, admin,
+                                         user, user_client):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            '?omit=author,text,comments_count,last_comment_at'
+        )
+
+        response = check_query_count(client, url, 3)
+        for review in response.json()['results']:
+            assert set(review) == {'id', 'score', 'pub_date'}
+
+        response = admin_client.get('/api/v1/users/?fields=username,role')
+        assert response.json()['results'] == [
+            {'username': user.username, 'role': user.role},
+            {'username': admin.username, 'role': admin.role},
+        ]
+
+        response = user_client.get('/api/v1/users/me/?fields=username')
+        assert response.json() == {'username': user.username}
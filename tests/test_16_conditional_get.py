@@ -0,0 +1,127 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ConditionalGet:
+
+    def test_01_titles_etag(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"') and response['Last-Modified'], (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        assert 'public' in response['Cache-Control']
+        assert 'Authorization' in response['Vary']
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что GET-запрос с совпадающим `If-None-Match` '
+            'получает ответ 304.'
+        )
+        assert not context.captured_queries, (
+            'Проверьте, что ответ 304 не выполняет запросов к базе.'
+        )
+        assert response['ETag'] == etag
+
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert 'private' in response['Cache-Control']
+
+        create_single_review(user_client, titles[0]['id'], 'review', 4)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения данных ETag меняется.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_reviews_etag_per_title(self, client, admin_client,
+                                       user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+
+        create_single_review(user_client, titles[1]['id'], 'review', 4)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв к другому произведению не меняет ETag '
+            'списка отзывов.'
+        )
+
+        review = create_single_review(
+            user_client, titles[0]['id'], 'review', 4
+        ).json()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+        comments_url = f'{url}{review["id"]}/comments/'
+        etag = client.get(comments_url)['ETag']
+        user_client.post(comments_url, data={'text': 'comment'})
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_same_second_write(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        last_modified = client.get(url)['Last-Modified']
+        create_single_review(user_client, titles[0]['id'], 'review', 4)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение в ту же секунду, что и предыдущий '
+            'ответ, не даёт 304 по `If-Modified-Since`.'
+        )
+
+    def test_04_missing_parent(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'review', 4
+        ).json()
+        for url in (
+            '/api/v1/titles/999999/reviews/',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}/'
+            'comments/',
+        ):
+            for header in ('*', client.get(url).get('ETag', '"x"')):
+                response = client.get(url, HTTP_IF_NONE_MATCH=header)
+                assert response.status_code == HTTPStatus.NOT_FOUND, (
+                    f'Проверьте, что `{url}` с `If-None-Match: {header}` '
+                    'возвращает 404 для несуществующего родителя.'
+                )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_05_authors_version(self, client, admin_client, user_client,
+                                user):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 4)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        user_client.patch('/api/v1/users/me/', data={'bio': 'новое'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что изменение пользователя без смены username '
+            'не сбрасывает ответы с отзывами.'
+        )
+        user.username = 'RenamedUser'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['author'] == 'RenamedUser'
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17NestedResources:
+
+    def test_01_review_create_loads_title_once(self, admin_client,
+                                               user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        create_single_review(admin_client, titles[0]['id'], 'review', 5)
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'text', 'score': 3})
+        assert response.status_code == HTTPStatus.CREATED
+        title_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_queries) == 1, (
+            'Проверьте, что при создании отзыва произведение загружается '
+            'один раз.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'text', 'score': 3})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что второй отзыв автора к произведению отклоняется.'
+        )
+        assert not any(
+            'FROM "reviews_review"' in query['sql']
+            for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ), 'Проверьте, что повтор отзыва отсекает ограничение в базе.'
+
+    def test_02_comment_review_must_belong_to_title(self, client,
+                                                    admin_client, admin,
+                                                    user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии к отзыву доступны только по адресу '
+            'его произведения.'
+        )
+        response = user_client.post(url, data={'text': 'comment'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_review_integrity_errors(self, admin_client, user_client,
+                                        moderator_client, monkeypatch):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        create_single_review(user_client, titles[0]['id'], 'review', 5)
+
+        def broken_save(review, *args, **kwargs):
+            raise IntegrityError('NOT NULL constraint failed')
+
+        monkeypatch.setattr(Review, 'save', broken_save)
+        with pytest.raises(IntegrityError):
+            moderator_client.post(url, data={'text': 'text', 'score': 3})
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ReviewCommentStats:
+
+    def test_01_counters_follow_comments(self, client, admin_client, admin,
+                                         user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+        data = client.get(url).json()
+        assert data['comments_count'] == 0, (
+            'Проверьте, что у отзыва без комментариев `comments_count` '
+            'равен 0.'
+        )
+        assert data['last_comment_at'] is None
+
+        create_single_comment(user_client, title_id, review_id, 'first')
+        last = create_single_comment(
+            admin_client, title_id, review_id, 'second'
+        ).json()
+        data = client.get(url).json()
+        assert data['comments_count'] == 2, (
+            'Проверьте, что `comments_count` увеличивается при создании '
+            'комментария.'
+        )
+        assert data['last_comment_at'] == last['pub_date'], (
+            'Проверьте, что `last_comment_at` равна дате последнего '
+            'комментария.'
+        )
+
+        response = admin_client.delete(f'{url}comments/{last["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        data = client.get(url).json()
+        assert data['comments_count'] == 1, (
+            'Проверьте, что `comments_count` уменьшается при удалении '
+            'комментария.'
+        )
+        assert data['last_comment_at'] is not None
+        assert data['last_comment_at'] < last['pub_date']
+
+    def test_02_ordering(self, client, admin_client, admin, user_client,
+                         user, moderator_client, moderator):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        title_id = titles[0]['id']
+        first, second, third = (review['id'] for review in reviews)
+        for review_id in (second, second, first):
+            create_single_comment(user_client, title_id, review_id, 'text')
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = client.get(f'{url}?ordering=-comments_count')
+        ids = [review['id'] for review in response.json()['results']]
+        assert ids == [second, first, third], (
+            'Проверьте, что отзывы можно отсортировать по количеству '
+            'комментариев.'
+        )
+        response = client.get(f'{url}?ordering=-last_comment_at')
+        ids = [review['id'] for review in response.json()['results']]
+        assert ids == [first, second, third], (
+            'Проверьте, что отзывы можно отсортировать по дате последнего '
+            'комментария.'
+        )
+        response = client.get(f'{url}?ordering=-comments_count&cursor=')
+        ids = [review['id'] for review in response.json()['results']]
+        assert ids == [second, first, third]
+
+    def test_03_list_etag_changes_on_comment(self, client, admin_client,
+                                             admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'text'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка отзывов.'
+        )
@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19OrderingIndexes:
+
+    def query_plan(self, client, url, table):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+            and 'ORDER BY' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    def test_01_orderings_use_indexes(self, client, admin_client, admin,
+                                      user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        cases = (
+            (reviews_url, 'reviews_review', 'pub_date', 'review_pub_date_idx'),
+            (reviews_url, 'reviews_review', 'score', 'review_score_idx'),
+            (reviews_url, 'reviews_review', 'comments_count',
+             'review_comments_count_idx'),
+            (reviews_url, 'reviews_review', 'last_comment_at',
+             'review_last_comment_at_idx'),
+            (comments_url, 'reviews_comment', 'pub_date',
+             'comment_pub_date_idx'),
+        )
+        for url, table, field, index in cases:
+            for ordering in (field, f'-{field}'):
+                plan = self.query_plan(
+                    client, f'{url}?ordering={ordering}', table
+                )
+                assert index in plan, (
+                    f'Проверьте, что сортировка `?ordering={ordering}` '
+                    f'использует индекс {index}. План: {plan}'
+                )
+                assert 'TEMP B-TREE' not in plan, (
+                    f'Проверьте, что сортировка `?ordering={ordering}` '
+                    f'не требует отдельной сортировки. План: {plan}'
+                )
+
+    def test_02_cursor_over_equal_values(self, client, admin_client,
+                                         django_user_model):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        django_user_model.objects.bulk_create(
+            django_user_model(username=f'author{idx}',
+                              email=f'author{idx}@yamdb.fake')
+            for idx in range(1100)
+        )
+        authors = django_user_model.objects.filter(
+            username__startswith='author'
+        )
+        Review.objects.bulk_create(
+            Review(title_id=titles[0]['id'], author=author, text='text',
+                   score=7)
+            for author in authors
+        )
+        expected = set(Review.objects.values_list('id', flat=True))
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for ordering in ('score', '-comments_count'):
+            url = f'{reviews_url}?ordering={ordering}&cursor='
+            ids = []
+            while url and len(ids) <= len(expected):
+                response = client.get(url)
+                assert response.status_code == 200
+                ids.extend(review['id'] for review in response.json()[
+                    'results'
+                ])
+                url = response.json()['next']
+            assert url is None and len(ids) == len(set(ids)) and (
+                set(ids) == expected
+            ), (
+                f'Проверьте, что курсор при `?ordering={ordering}` проходит '
+                'все отзывы с равными значениями ровно один раз.'
+            )
+            previous = client.get(
+                client.get(
+                    f'{reviews_url}?ordering={ordering}&cursor='
+                ).json()['next']
+            ).json()['previous']
+            response = client.get(previous)
+            assert [review['id'] for review in response.json()[
+                'results'
+            ]] == ids[:10], (
+                'Проверьте, что ссылка `previous` возвращает '
+                'предыдущую страницу.'
+            )
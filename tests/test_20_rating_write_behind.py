@@ -0,0 +1,92 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import DirtyTitle
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.fixture
+def write_behind(settings):
+    settings.RATING_WRITE_BEHIND = True
+    settings.RATING_MAX_STALENESS = None
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20RatingWriteBehind:
+
+    def test_01_drain_recomputes_queued_titles(self, client, admin_client,
+                                               user_client, write_behind):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        create_single_review(admin_client, titles[0]['id'], 'review', 4)
+
+        assert client.get(url).json()['rating'] is None, (
+            'Проверьте, что в режиме отложенной записи отзыв не меняет '
+            'рейтинг до разбора очереди.'
+        )
+        assert DirtyTitle.objects.count() == 1, (
+            'Проверьте, что отметки одного произведения схлопываются.'
+        )
+
+        out = StringIO()
+        call_command('drain_ratings', '--once', stdout=out)
+        assert 'drained=1 depth=0' in out.getvalue()
+        assert not DirtyTitle.objects.exists()
+        response = client.get(url)
+        assert response.json()['rating'] == 5, (
+            'Проверьте, что `drain_ratings` пересчитывает рейтинг и '
+            'сбрасывает закэшированный ответ.'
+        )
+        call_command('recount_ratings', '--check', stdout=StringIO())
+
+    def test_02_stale_queue_recomputes_own_title(self, admin_client,
+                                                 user_client, write_behind):
+        write_behind.RATING_MAX_STALENESS = 0
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        assert DirtyTitle.objects.count() == 1
+
+        create_single_review(user_client, titles[1]['id'], 'review', 3)
+        response = admin_client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json()['rating'] == 3, (
+            'Проверьте, что при очереди, отставшей больше чем на '
+            '`RATING_MAX_STALENESS`, запись отзыва сразу пересчитывает '
+            'своё произведение.'
+        )
+        assert list(
+            DirtyTitle.objects.values_list('title_id', flat=True)
+        ) == [titles[0]['id']], (
+            'Проверьте, что запись отзыва не разбирает очередь других '
+            'произведений.'
+        )
+
+    def test_03_stats(self, admin_client, user_client, write_behind):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        create_single_review(user_client, titles[1]['id'], 'review', 7)
+        out = StringIO()
+        call_command('drain_ratings', '--stats', stdout=out)
+        assert out.getvalue().startswith('depth=2 lag='), (
+            'Проверьте, что `drain_ratings --stats` выводит глубину '
+            'очереди и отставание.'
+        )
+
+    def test_04_text_edit_is_not_queued(self, admin_client, user_client,
+                                        write_behind):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'review', 7
+        ).json()
+        call_command('drain_ratings', '--once', stdout=StringIO())
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+        user_client.patch(url, data={'text': 'новый текст'})
+        assert not DirtyTitle.objects.exists(), (
+            'Проверьте, что правка только текста отзыва не ставит '
+            'произведение в очередь пересчёта.'
+        )
+        user_client.patch(url, data={'score': 9})
+        assert DirtyTitle.objects.count() == 1
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ReviewExport:
+
+    def create_data(self, admin_client, admin, user_client, user):
+        return create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+
+    def test_01_permissions(self, client, admin_client, admin, user_client,
+                            user, moderator_client):
+        _, _, titles = self.create_data(admin_client, admin, user_client,
+                                        user)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/export/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что выгрузка отзывов недоступна пользователю.'
+        )
+        assert moderator_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что выгрузка отзывов доступна модератору.'
+        )
+        response = admin_client.get('/api/v1/titles/0/reviews/export/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = admin_client.get(f'{url}?output=xml')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_ndjson(self, admin_client, admin, user_client, user):
+        comments, reviews, titles = self.create_data(
+            admin_client, admin, user_client, user
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/export/?comments=1'
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоком.'
+        )
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [record['id'] for record in records] == sorted(
+            review['id'] for review in reviews
+        ), 'Проверьте, что выгружаются все отзывы произведения.'
+        detail = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        ).json()
+        first = records[0]
+        assert {
+            key: value for key, value in first.items() if key != 'comments'
+        } == detail, (
+            'Проверьте, что поля отзыва в выгрузке совпадают с API.'
+        )
+        assert [comment['id'] for comment in first['comments']] == [
+            comment['id'] for comment in comments
+        ], 'Проверьте, что к отзыву выгружаются его комментарии.'
+        assert records[1]['comments'] == []
+
+    def test_03_csv(self, admin_client, admin, user_client, user):
+        comments, reviews, titles = self.create_data(
+            admin_client, admin, user_client, user
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/export/?output=csv'
+        response = admin_client.get(url)
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        assert len(rows) == len(reviews), (
+            'Проверьте, что без `comments` выгружаются только отзывы.'
+        )
+
+        response = admin_client.get(f'{url}&comments=true')
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        assert len(rows) == len(reviews) + len(comments)
+        assert rows[0]['comment_id'] == ''
+        assert [row['comment_id'] for row in rows[1:len(comments) + 1]] == [
+            str(comment['id']) for comment in comments
+        ], 'Проверьте, что комментарии идут за строкой своего отзыва.'
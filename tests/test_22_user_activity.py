@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22UserActivity:
+
+    def create_activity(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        expected = []
+        for title in titles:
+            review = create_single_review(
+                user_client, title['id'], 'review', 5
+            ).json()
+            expected.append(('review', review['id']))
+            create_single_review(admin_client, title['id'], 'review', 5)
+        for idx in range(12):
+            title_id = titles[idx % 2]['id']
+            review_id = expected[idx % 2][1]
+            comment = create_single_comment(
+                user_client, title_id, review_id, f'comment {idx}'
+            ).json()
+            expected.append(('comment', comment['id']))
+        return titles, expected[::-1]
+
+    def read_feed(self, client, url):
+        items, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            items.extend(data['results'])
+            url, pages = data['next'], pages + 1
+        return items, pages
+
+    def test_01_feed_is_merged_newest_first(self, client, admin_client,
+                                            user_client, user):
+        titles, expected = self.create_activity(admin_client, user_client)
+        items, pages = self.read_feed(
+            client, f'/api/v1/users/{user.username}/activity/'
+        )
+        assert [(item['type'], item['id']) for item in items] == expected, (
+            'Проверьте, что лента содержит все отзывы и комментарии автора '
+            'от новых к старым без повторов.'
+        )
+        assert pages == 2, (
+            'Проверьте, что лента разбита на страницы по курсору.'
+        )
+        review = next(item for item in items if item['type'] == 'review')
+        assert set(review) == {
+            'type', 'id', 'title_id', 'text', 'score', 'pub_date'
+        }
+        comment = next(item for item in items if item['type'] == 'comment')
+        assert set(comment) == {
+            'type', 'id', 'title_id', 'review_id', 'text', 'pub_date'
+        }
+
+        me_items, _ = self.read_feed(user_client, '/api/v1/users/me/activity/')
+        assert me_items == items, (
+            'Проверьте, что `/users/me/activity/` показывает ленту текущего '
+            'пользователя.'
+        )
+
+    def test_02_errors(self, client, user):
+        assert client.get(
+            '/api/v1/users/me/activity/'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        assert client.get(
+            '/api/v1/users/nobody/activity/'
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert client.get(
+            f'/api/v1/users/{user.username}/activity/?cursor=bad'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    def test_03_streams_use_indexes(self, client, admin_client,
+                                    user_client, user):
+        self.create_activity(admin_client, user_client)
+        url = f'/api/v1/users/{user.username}/activity/'
+        cursor = client.get(url).json()['next']
+        with CaptureQueriesContext(connection) as context:
+            client.get(cursor)
+        plans = []
+        with connection.cursor() as db_cursor:
+            for query in context.captured_queries:
+                if 'ORDER BY' not in query['sql']:
+                    continue
+                db_cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plans.append(
+                    ' | '.join(row[-1] for row in db_cursor.fetchall())
+                )
+        assert len(plans) == 2
+        for plan, index in zip(plans, ('review_author_pub_date_idx',
+                                       'comment_author_pub_date_idx')):
+            assert index in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что поток ленты читается по индексу {index}. '
+                f'План: {plan}'
+            )
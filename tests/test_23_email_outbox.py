@@ -0,0 +1,101 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+def signup(client, idx=0):
+    return client.post(SIGNUP_URL, data={
+        'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+    })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23EmailOutbox:
+
+    def test_01_signup_queues_and_sends(self, client, settings):
+        settings.OUTBOX_SEND_ON_COMMIT = True
+        response = signup(client)
+        assert response.status_code == HTTPStatus.OK
+        message = OutgoingEmail.objects.get()
+        assert message.status == OutgoingEmail.SENT, (
+            'Проверьте, что письмо регистрации проходит через исходящую '
+            'очередь и отправляется после фиксации транзакции.'
+        )
+        assert len(mail.outbox) == 1
+
+    def test_02_dispatcher_sends_batch_over_one_connection(self, client,
+                                                           settings):
+        settings.EMAIL_BACKEND = (
+            'tests.test_23_email_outbox.CountingBackend'
+        )
+        CountingBackend.opened = 0
+        for idx in range(3):
+            assert signup(client, idx).status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что без `OUTBOX_SEND_ON_COMMIT` регистрация не '
+            'отправляет письмо сама.'
+        )
+        out = StringIO()
+        call_command('send_outbox', '--once', stdout=out)
+        assert len(mail.outbox) == 3
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        assert out.getvalue().startswith('sent=3 failed=0 dead=0 pending=0')
+
+    def test_03_retry_and_dead_letter(self, client, settings):
+        settings.OUTBOX_SEND_ON_COMMIT = True
+        settings.EMAIL_BACKEND = 'tests.test_23_email_outbox.FailingBackend'
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        response = signup(client)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что сбой почты не ломает регистрацию.'
+        )
+        message = OutgoingEmail.objects.get()
+        assert message.status == OutgoingEmail.PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > timezone.now(), (
+            'Проверьте, что неудачная попытка откладывается.'
+        )
+        assert 'SMTP недоступен' in message.last_error
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        message.refresh_from_db()
+        assert message.attempts == 1, (
+            'Проверьте, что отложенное письмо не отправляется раньше срока.'
+        )
+
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command('send_outbox', '--once', stdout=out)
+        message.refresh_from_db()
+        assert message.status == OutgoingEmail.DEAD, (
+            'Проверьте, что после `OUTBOX_MAX_ATTEMPTS` попыток письмо '
+            'переходит в состояние dead.'
+        )
+        assert 'dead=1' in out.getvalue()
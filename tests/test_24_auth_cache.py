@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import TokenUserCache
+from api.backends import VersionFileCache
+
+ME_URL = '/api/v1/users/me/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24AuthCache:
+
+    def test_01_repeated_requests_skip_user_query(self, user_client):
+        assert user_client.get(ME_URL).status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert not [
+            query for query in context.captured_queries
+            if 'FROM "users_user"' in query['sql']
+        ], (
+            'Проверьте, что повторный запрос с тем же токеном не загружает '
+            'пользователя из базы.'
+        )
+
+    def test_02_role_change_applies_immediately(self, admin_client,
+                                                user_client, user):
+        assert user_client.get(ME_URL).json()['role'] == 'user'
+        assert user_client.get('/api/v1/users/').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(ME_URL).json()['role'] == 'admin', (
+            'Проверьте, что смена роли сбрасывает кэш аутентификации.'
+        )
+        assert user_client.get('/api/v1/users/').status_code == HTTPStatus.OK
+
+    def test_03_deactivated_and_deleted_users(self, user_client, user,
+                                              moderator_client, moderator):
+        assert user_client.get(ME_URL).status_code == HTTPStatus.OK
+        user.is_active = False
+        user.save()
+        assert user_client.get(ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что заблокированный пользователь теряет доступ.'
+
+        assert moderator_client.get(ME_URL).status_code == HTTPStatus.OK
+        moderator.delete()
+        assert moderator_client.get(ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что удалённый пользователь теряет доступ.'
+
+    def test_04_change_in_another_process(self, user_client, user,
+                                          django_user_model):
+        assert user_client.get(ME_URL).json()['role'] == 'user'
+        django_user_model.objects.filter(pk=user.pk).update(role='admin')
+        # Изменение в другом процессе: его сигнал увеличивает версию
+        # пользователя в общем кэше версий.
+        location = settings.CACHES['versions']['LOCATION']
+        subprocess.run(
+            [sys.executable, '-c',
+             'import django; django.setup(); '
+             'from django.conf import settings; '
+             f'settings.CACHES["versions"]["LOCATION"] = {location!r}; '
+             'from api.cache import bump_version; '
+             f'bump_version("user:{user.pk}")'],
+            cwd=settings.BASE_DIR, check=True,
+            env={**os.environ,
+                 'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings'},
+        )
+        assert user_client.get(ME_URL).json()['role'] == 'admin', (
+            'Проверьте, что версии пользователей хранятся в кэше, общем '
+            'для процессов приложения.'
+        )
+
+
+def test_token_user_cache_is_bounded():
+    users = TokenUserCache(2)
+    users.set('a', 1)
+    users.set('b', 2)
+    assert users.get('a') == 1
+    users.set('c', 3)
+    assert users.get('b') is None, (
+        'Проверьте, что из кэша вытесняется давно не использованная запись.'
+    )
+    assert users.get('a') == 1 and users.get('c') == 3
+
+
+def bump_many(location, times):
+    store = VersionFileCache(location, {})
+    for _ in range(times):
+        store.incr('version')
+
+
+def test_version_incr_is_atomic_across_processes(tmp_path):
+    store = VersionFileCache(str(tmp_path), {})
+    store.add('version', 0)
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=bump_many, args=(str(tmp_path), 300))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert store.get('version') == 900, (
+        'Проверьте, что одновременные увеличения версии из разных '
+        'процессов не теряются.'
+    )
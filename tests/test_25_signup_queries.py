@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SignupQueries:
+
+    def signup(self, client, data):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(SIGNUP_URL, data=data)
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"users_user"' in query['sql']
+        ]
+        return response, user_queries
+
+    def test_01_signup_takes_two_user_queries(self, client):
+        data = {'email': 'new@yamdb.fake', 'username': 'new_user'}
+        response, queries = self.signup(client, data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) <= 2, (
+            'Проверьте, что регистрация нового пользователя выполняет не '
+            'больше двух запросов к таблице пользователей.'
+        )
+        response, queries = self.signup(client, data)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == data
+        assert len(queries) == 1, (
+            'Проверьте, что повторная регистрация находит пользователя '
+            'одним запросом.'
+        )
+
+    def test_02_foreign_username_or_email(self, client, user):
+        for data in (
+            {'email': 'other@yamdb.fake', 'username': user.username},
+            {'email': user.email, 'username': 'other'},
+        ):
+            response, queries = self.signup(client, data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+            assert len(queries) == 1
@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+
+REFRESH_URL = '/api/v1/auth/token/refresh/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TokenRefresh:
+
+    def obtain(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()
+
+    def test_01_refresh_with_rotation(self, client, user):
+        tokens = self.obtain(client, user)
+        assert set(tokens) == {'token', 'refresh'}, (
+            'Проверьте, что вместе с access-токеном возвращается '
+            'refresh-токен.'
+        )
+
+        response = client.post(REFRESH_URL, data={
+            'refresh': tokens['refresh']
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{REFRESH_URL}` выдаёт новый access-токен.'
+        )
+        refreshed = response.json()
+        assert set(refreshed) == {'access', 'refresh'}
+        assert refreshed['refresh'] != tokens['refresh'], (
+            'Проверьте, что при обновлении выдаётся новый refresh-токен.'
+        )
+
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=(
+            f'Bearer {refreshed["access"]}'
+        ))
+        response = api_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+
+        response = client.post(REFRESH_URL, data={
+            'refresh': tokens['refresh']
+        })
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что использованный refresh-токен нельзя '
+            'использовать повторно.'
+        )
+
+    def test_02_invalid_refresh(self, client):
+        response = client.post(REFRESH_URL, data={'refresh': 'bad'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
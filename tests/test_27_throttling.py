@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import TokenBucketThrottle
+from tests.utils import create_titles
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates
+        }
+    return set_rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+    return now
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Throttling:
+
+    def test_01_auth_username_bucket(self, client, rates, clock):
+        rates(auth_username='2/min')
+        data = {'email': 'bot@yamdb.fake', 'username': 'bot'}
+        for _ in range(2):
+            assert client.post(SIGNUP_URL, data=data).status_code == (
+                HTTPStatus.OK
+            )
+        sent = len(mail.outbox)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(SIGNUP_URL, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что частые регистрации одного username '
+            'ограничиваются ответом 429.'
+        )
+        assert response['Retry-After'] == '30', (
+            'Проверьте, что ответ 429 содержит заголовок Retry-After.'
+        )
+        assert not context.captured_queries and len(mail.outbox) == sent, (
+            'Проверьте, что ограниченный запрос не обращается к базе и '
+            'не отправляет писем.'
+        )
+        response = client.post(SIGNUP_URL, data={
+            'email': 'other@yamdb.fake', 'username': 'other'
+        })
+        assert response.status_code == HTTPStatus.OK
+
+        clock[0] += 30
+        assert client.post(SIGNUP_URL, data=data).status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что ведро пополняется со временем.'
+
+    def test_02_auth_ip_bucket(self, client, rates, clock):
+        rates(auth_ip='3/min')
+        for idx in range(3):
+            response = client.post(SIGNUP_URL, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+            })
+            assert response.status_code == HTTPStatus.OK
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'user0', 'confirmation_code': 'code'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что регистрация и получение токена ограничиваются '
+            'по адресу клиента.'
+        )
+
+    def test_03_content_write_bucket(self, admin_client, user_client,
+                                     rates, clock):
+        titles, _, _ = create_titles(admin_client)
+        rates(content_write='1/min')
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = user_client.post(url, data={'text': 'text', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'text', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что запись отзывов ограничивается по пользователю.'
+        )
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что чтение не ограничивается.'
+        )
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'text', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_04_auth_ip_ignores_spoofed_forwarded_for(self, client, rates,
+                                                      clock):
+        rates(auth_ip='3/min')
+        for idx in range(3):
+            response = client.post(SIGNUP_URL, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}')
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(SIGNUP_URL, data={
+            'email': 'user3@yamdb.fake', 'username': 'user3'
+        }, HTTP_X_FORWARDED_FOR='10.0.0.3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что ограничение по адресу нельзя обойти, меняя '
+            'заголовок X-Forwarded-For.'
+        )
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+
+URL = '/api/v1/users/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28UserSearch:
+
+    def usernames(self, client, search):
+        response = client.get(URL, {'search': search})
+        assert response.status_code == 200
+        return {user['username'] for user in response.json()['results']}
+
+    def test_01_prefix_casefold_search(self, admin_client):
+        User.objects.create_user(username='Иван', email='ivan@yamdb.fake')
+        User.objects.create_user(username='ИВАННА', email='anna@yamdb.fake')
+        User.objects.create_user(username='Пётр', email='petr@Yamdb.fake')
+
+        assert self.usernames(admin_client, 'ива') == {'Иван', 'ИВАННА'}, (
+            'Проверьте, что поиск пользователей идёт по префиксу без учёта '
+            'регистра, в том числе для кириллицы.'
+        )
+        assert self.usernames(admin_client, 'ван') == set(), (
+            'Проверьте, что поиск пользователей идёт по префиксу.'
+        )
+        assert self.usernames(admin_client, 'PETR@yamdb') == {'Пётр'}, (
+            'Проверьте, что пользователя можно найти по началу email.'
+        )
+
+        user = User.objects.get(username='Пётр')
+        user.username = 'Павел'
+        user.save(update_fields=['username'])
+        assert self.usernames(admin_client, 'пав') == {'Павел'}, (
+            'Проверьте, что поле поиска обновляется при сохранении.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    def test_02_search_uses_indexes(self, admin_client):
+        User.objects.create_user(username='Иван', email='ivan@yamdb.fake')
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(URL, {'search': 'ива'})
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'ORDER BY' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        assert 'username_search' in plan and 'email_search' in plan, (
+            f'Проверьте, что поиск читает индексы полей поиска. План: {plan}'
+        )
+        assert 'SCAN users_user' not in plan, (
+            f'Проверьте, что поиск не читает всю таблицу. План: {plan}'
+        )
@@ -0,0 +1,226 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, GenreTitle, Review, Title
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29DeferredDeletion:
+
+    @pytest.fixture(autouse=True)
+    def deferred_deletion(self, settings):
+        settings.DEFERRED_DELETION = True
+
+    def test_01_title_hidden_then_purged(self, client, admin_client,
+                                         user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            user_client, title_id, 'review', 7
+        ).json()
+        for number in range(5):
+            create_single_comment(
+                admin_client, title_id, review['id'], f'comment {number}'
+            )
+        url = f'/api/v1/titles/{title_id}/'
+        assert client.get('/api/v1/titles/').json()['count'] == 2
+
+        response = admin_client.delete(url)
+        assert response.status_code == 204
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что удалённое произведение сразу скрыто из API.'
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == 1, (
+            'Проверьте, что удалённое произведение пропадает из списка.'
+        )
+        assert client.get(f'{url}reviews/').status_code == 404
+        assert client.get(
+            f'{url}reviews/{review["id"]}/comments/'
+        ).status_code == 404, (
+            'Проверьте, что комментарии удалённого произведения скрыты.'
+        )
+        assert Title.all_objects.filter(pk=title_id).exists(), (
+            'Проверьте, что при отложенном удалении строка остаётся '
+            'до очистки.'
+        )
+
+        out = StringIO()
+        call_command('purge_deleted', '--once', '--chunk-size', '2',
+                     stdout=out)
+        assert 'purged_titles=1' in out.getvalue()
+        assert 'pending_titles=0' in out.getvalue()
+        assert not Title.all_objects.filter(pk=title_id).exists()
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert not Comment.objects.filter(review_id=review['id']).exists()
+        assert not GenreTitle.objects.filter(title_id=title_id).exists()
+
+    def test_02_user_purge_recomputes_aggregates(self, client, admin_client,
+                                                 user_client, moderator_client,
+                                                 django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'review', 10)
+        kept = create_single_review(
+            moderator_client, title_id, 'review', 4
+        ).json()
+        for number in range(3):
+            create_single_comment(
+                user_client, title_id, kept['id'], f'comment {number}'
+            )
+        create_single_comment(moderator_client, title_id, kept['id'], 'own')
+        assert client.get(f'/api/v1/titles/{title_id}/').json()[
+            'rating'] == 7
+
+        response = admin_client.delete('/api/v1/users/TestUser/')
+        assert response.status_code == 204
+        assert admin_client.get(
+            '/api/v1/users/TestUser/'
+        ).status_code == 404
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удалённый пользователь сразу теряет доступ.'
+        )
+        user = django_user_model.all_objects.get(username='TestUser')
+        assert user.deleted_at is not None and not user.is_active
+
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'TestUser', 'email': 'testuser@yamdb.fake'
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что ник и почта удалённого пользователя заняты '
+            'до очистки.'
+        )
+
+        call_command('purge_deleted', '--once', '--chunk-size', '2',
+                     stdout=StringIO())
+        assert not django_user_model.all_objects.filter(
+            username='TestUser'
+        ).exists()
+        title = client.get(f'/api/v1/titles/{title_id}/').json()
+        assert title['rating'] == 4, (
+            'Проверьте, что после очистки рейтинг произведения '
+            'пересчитан без отзывов удалённого пользователя.'
+        )
+        reviews = client.get(f'/api/v1/titles/{title_id}/reviews/').json()
+        assert reviews['count'] == 1
+        assert reviews['results'][0]['comments_count'] == 1, (
+            'Проверьте, что очистка пересчитывает счётчики комментариев '
+            'оставшихся отзывов.'
+        )
+        call_command('recount_ratings', '--check', stdout=StringIO())
+
+    def test_03_immediate_deletion(self, client, admin_client, user_client,
+                                   settings):
+        settings.DEFERRED_DELETION = False
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        response = admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == 204
+        assert not Title.all_objects.filter(pk=titles[0]['id']).exists(), (
+            'Проверьте, что без `DEFERRED_DELETION` произведение '
+            'удаляется сразу.'
+        )
+        assert not Review.objects.exists()
+
+    def test_04_user_content_hidden_before_purge(self, client, admin_client,
+                                                 user_client,
+                                                 moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/'
+        hidden = create_single_review(
+            user_client, title_id, 'review', 10
+        ).json()
+        kept = create_single_review(
+            moderator_client, title_id, 'review', 4
+        ).json()
+        create_single_comment(user_client, title_id, kept['id'], 'hidden')
+        create_single_comment(moderator_client, title_id, kept['id'], 'own')
+        create_single_comment(
+            moderator_client, title_id, hidden['id'], 'under hidden'
+        )
+        reviews_etag = client.get(f'{url}reviews/')['ETag']
+        assert client.get(url).json()['rating'] == 7
+
+        admin_client.delete('/api/v1/users/TestUser/')
+        response = client.get(
+            f'{url}reviews/', HTTP_IF_NONE_MATCH=reviews_etag
+        )
+        assert response.status_code == 200
+        reviews = response.json()
+        assert [review['id'] for review in reviews['results']] == [
+            kept['id']
+        ], 'Проверьте, что отзывы удалённого пользователя скрыты до очистки.'
+        comments = client.get(
+            f'{url}reviews/{kept["id"]}/comments/'
+        ).json()['results']
+        assert [comment['text'] for comment in comments] == ['own'], (
+            'Проверьте, что комментарии удалённого пользователя скрыты '
+            'до очистки.'
+        )
+        assert client.get(
+            f'{url}reviews/{hidden["id"]}/comments/'
+        ).status_code == 404
+        activity = moderator_client.get(
+            '/api/v1/users/me/activity/'
+        ).json()['results']
+        assert 'under hidden' not in [item['text'] for item in activity]
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что отзывы удалённого пользователя учитываются '
+            'в рейтинге до очистки.'
+        )
+        call_command('recount_ratings', '--check', stdout=StringIO())
+        call_command('recount_ratings', stdout=StringIO())
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что пересчёт до очистки учитывает отзывы удалённого '
+            'пользователя так же, как изменения по одной записи.'
+        )
+
+        call_command('purge_deleted', '--once', stdout=StringIO())
+        assert client.get(url).json()['rating'] == 4, (
+            'Проверьте, что очистка пересчитывает рейтинг без отзывов '
+            'удалённого пользователя.'
+        )
+        reviews = client.get(f'{url}reviews/').json()
+        assert reviews['results'][0]['comments_count'] == 1
+        call_command('recount_ratings', '--check', stdout=StringIO())
+
+    def test_05_hidden_content_deleted_before_purge(self, admin_client,
+                                                    user_client,
+                                                    moderator_client):
+        from reviews.aggregates import (recompute_review_comments,
+                                        recompute_title_aggregates)
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            user_client, title_id, 'review', 7
+        ).json()
+        create_single_comment(
+            moderator_client, title_id, review['id'], 'comment'
+        )
+        hidden = create_single_review(
+            moderator_client, title_id, 'review', 3
+        ).json()
+        admin_client.delete('/api/v1/users/TestModerator/')
+        # Пересчёт до очистки (например, из очереди) по-прежнему учитывает
+        # отзывы и комментарии удалённого пользователя.
+        recompute_review_comments([review['id']])
+        recompute_title_aggregates([title_id])
+
+        Review.objects.get(pk=hidden['id']).delete()
+        response = user_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+        )
+        assert response.status_code == 204, (
+            'Проверьте, что удаление отзыва с комментарием удалённого '
+            'пользователя не уменьшает счётчик комментариев ниже нуля.'
+        )
+        title = Title.objects.get(pk=title_id)
+        assert (title.reviews_count, title.score_sum) == (0, 0), (
+            'Проверьте, что удаление скрытого отзыва не меняет агрегаты '
+            'произведения.'
+        )
@@ -0,0 +1,165 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def create_users(django_user_model):
+    for username in ('TestUser1234', 'TestUser4321'):
+        django_user_model.objects.create_user(
+            username=username, email=f'{username.lower()}@yamdb.fake'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30UserBulkUpdate:
+    url = '/api/v1/users/bulk/'
+
+    def test_01_by_usernames(self, admin_client, admin, django_user_model):
+        create_users(django_user_model)
+        data = {
+            'usernames': [
+                'TestUser1234', 'TestUser4321', 'missing', 'TestAdmin'
+            ],
+            'changes': {'role': 'moderator', 'bio': 'bulk'},
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json() == {
+            'updated': 2,
+            'results': [
+                {'username': 'TestUser1234', 'status': 'updated'},
+                {'username': 'TestUser4321', 'status': 'updated'},
+                {'username': 'missing', 'status': 'not_found'},
+                {'username': 'TestAdmin', 'status': 'skipped'},
+            ],
+        }, (
+            'Проверьте, что `/api/v1/users/bulk/` возвращает результат по '
+            'каждому пользователю и не меняет роль самому администратору.'
+        )
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1, (
+            'Проверьте, что изменения применяются одним UPDATE.'
+        )
+        users = django_user_model.objects.filter(
+            username__in=('TestUser1234', 'TestUser4321')
+        )
+        assert {(user.role, user.bio) for user in users} == {
+            ('moderator', 'bulk')
+        }
+        admin.refresh_from_db()
+        assert admin.role == 'admin'
+
+    def test_02_by_filter(self, admin_client, django_user_model):
+        create_users(django_user_model)
+        data = {
+            'filter': {'role': 'user', 'search': 'testuser4'},
+            'changes': {'is_active': False},
+        }
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json()['updated'] == 1
+        assert not django_user_model.objects.get(
+            username='TestUser4321'
+        ).is_active
+        assert django_user_model.objects.get(
+            username='TestUser1234'
+        ).is_active
+
+    def test_03_invalidates_token_cache(self, admin_client, user,
+                                        user_client):
+        assert user_client.get('/api/v1/users/me/').json()['role'] == 'user'
+        response = admin_client.post(self.url, data={
+            'usernames': [user.username], 'changes': {'role': 'moderator'}
+        }, format='json')
+        assert response.status_code == 200
+        assert user_client.get(
+            '/api/v1/users/me/'
+        ).json()['role'] == 'moderator', (
+            'Проверьте, что массовое изменение сбрасывает пользователя '
+            'в кэше аутентификации.'
+        )
+        admin_client.post(self.url, data={
+            'usernames': [user.username], 'changes': {'is_active': False}
+        }, format='json')
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что деактивированный пользователь сразу теряет '
+            'доступ.'
+        )
+
+    def test_04_validation(self, admin_client, user_client, moderator_client):
+        valid = {'usernames': ['TestUser'], 'changes': {'role': 'user'}}
+        for client in (user_client, moderator_client):
+            response = client.post(self.url, data=valid, format='json')
+            assert response.status_code == 403, (
+                'Проверьте, что массовое изменение доступно только '
+                'администратору.'
+            )
+        invalid = (
+            {'changes': {'role': 'user'}},
+            {'usernames': ['TestUser'], 'filter': {'role': 'user'},
+             'changes': {'role': 'user'}},
+            {'usernames': ['TestUser'], 'changes': {}},
+            {'usernames': ['TestUser'], 'changes': {'role': 'owner'}},
+            {'filter': {}, 'changes': {'role': 'user'}},
+        )
+        for data in invalid:
+            response = admin_client.post(self.url, data=data, format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что запрос {data} к `{self.url}` возвращает '
+                'ответ со статусом 400.'
+            )
+
+    def test_05_reserved_username(self, admin_client, user):
+        for username in ('bulk', 'me'):
+            response = admin_client.post('/api/v1/users/', data={
+                'username': username, 'email': f'{username}@yamdb.fake'
+            })
+            assert response.status_code == 400, (
+                f'Проверьте, что администратор не может создать '
+                f'пользователя с username `{username}`.'
+            )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'bulk'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что пользователя нельзя переименовать в `bulk`.'
+        )
+
+    def test_06_deactivated_user_cannot_reactivate(self, client, admin_client,
+                                                   user, django_user_model):
+        from django.contrib.auth.tokens import default_token_generator
+
+        admin_client.post(self.url, data={
+            'usernames': [user.username], 'changes': {'is_active': False}
+        }, format='json')
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': user.username, 'email': user.email
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что пользователь, деактивированный администратором, '
+            'не может зарегистрироваться заново.'
+        )
+        user = django_user_model.objects.get(pk=user.pk)
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения не активирует пользователя, '
+            'деактивированного администратором.'
+        )
+        user.refresh_from_db()
+        assert not user.is_active
+
+        admin_client.post(self.url, data={
+            'usernames': [user.username], 'changes': {'is_active': True}
+        }, format='json')
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': user.username, 'email': user.email
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что повторная активация администратором снимает '
+            'блокировку.'
+        )
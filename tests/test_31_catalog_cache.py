@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import bump_version
+from reviews.models import Category
+from tests.utils import check_query_count, create_titles
+
+
+def catalog_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_category"' in query['sql']
+        or 'FROM "reviews_genre"' in query['sql']
+        or 'JOIN "reviews_category"' in query['sql']
+        or 'JOIN "reviews_genre"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31CatalogCache:
+
+    def test_01_lists_without_queries(self, admin_client):
+        create_titles(admin_client)
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            admin_client.get(url)
+            response = check_query_count(admin_client, url, 0)
+            assert response.json()['count'] > 0, (
+                f'Проверьте, что `{url}` отдаёт справочник из памяти без '
+                'запросов к базе.'
+            )
+        response = admin_client.get('/api/v1/genres/?search=Драма')
+        assert [genre['slug'] for genre in response.json()['results']] == [
+            'drama'
+        ]
+
+    def test_02_title_write_and_read(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': 'Чужой',
+                'year': 1979,
+                'genre': ['horror', 'drama'],
+                'category': 'films',
+            })
+        assert response.status_code == 201
+        slug_queries = [query['sql'] for query in context.captured_queries
+                        if '"slug" =' in query['sql']]
+        assert not slug_queries, (
+            'Проверьте, что slug категории и жанров при записи '
+            'произведения находятся без запросов к справочникам.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert not catalog_queries(context), (
+            'Проверьте, что категория и жанры произведения берутся '
+            'из справочников в памяти.'
+        )
+        data = response.json()
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert data['genre'] == [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+        ]
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['missing'],
+            'category': 'films',
+        })
+        assert response.status_code == 400
+        assert 'genre' in response.json()
+
+    def test_03_catalog_follows_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert admin_client.get(url).json()['category']['slug'] == 'films'
+
+        admin_client.post('/api/v1/categories/', data={
+            'name': 'Музыка', 'slug': 'music'
+        })
+        slugs = [item['slug'] for item in admin_client.get(
+            '/api/v1/categories/'
+        ).json()['results']]
+        assert 'music' in slugs, (
+            'Проверьте, что новая категория сразу видна в справочнике.'
+        )
+        response = admin_client.patch(url, data={'category': 'music'})
+        assert response.status_code == 200
+
+        admin_client.delete('/api/v1/categories/music/')
+        assert admin_client.get(url).json()['category'] is None, (
+            'Проверьте, что удалённая категория пропадает из справочника.'
+        )
+        response = admin_client.patch(url, data={'category': 'music'})
+        assert response.status_code == 400
+
+    def test_04_deleted_in_another_process(self, admin_client, settings):
+        create_titles(admin_client)
+        data = {'name': 'Чужой', 'year': 1979, 'genre': ['drama']}
+        for slug in ('music', 'games'):
+            admin_client.post('/api/v1/categories/', data={
+                'name': slug, 'slug': slug
+            })
+        admin_client.get('/api/v1/categories/')
+
+        # Другой процесс удаляет категорию, и его сигнал увеличивает
+        # версию справочника в общем кэше версий.
+        Category.objects.filter(slug='music')._raw_delete('default')
+        bump_version('categories')
+        response = admin_client.post(
+            '/api/v1/titles/', data={**data, 'category': 'music'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что категория, удалённая в другом процессе, '
+            'не проходит проверку slug.'
+        )
+
+        # Версия не увеличилась (например, процесс упал после фиксации):
+        # старый снимок перечитывается перед проверкой.
+        settings.CATALOG_MAX_AGE = 0
+        Category.objects.filter(slug='games')._raw_delete('default')
+        response = admin_client.post(
+            '/api/v1/titles/', data={**data, 'category': 'games'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что снимок старше `CATALOG_MAX_AGE` сверяется '
+            'с базой.'
+        )
@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +308,20 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def check_query_count(client, url, max_queries):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    queries = len(context.captured_queries)
+    assert queries <= max_queries, (
+        f'GET-запрос к `{url}` выполняет {queries} SQL-запросов, '
+        f'допустимо не более {max_queries}:\n' + '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+    )
+    return response